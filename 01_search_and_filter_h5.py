@@ -39,14 +39,17 @@ import ssl
 import sys
 from getpass import getpass
 import datetime
-from shapely.geometry import Polygon
-from shapely.ops import unary_union
-from itertools import combinations
-import pandas as pd
+import itertools
+import math
 import copy
 import os
-from util.performance_util import start_time_measure, end_time_measure
+import time
+from util.performance_util import start_time_measure, end_time_measure, ordered_parallel_map
 from util.gis_util import get_bounding_box_from_shp
+from util.file_util import rows_to_manifest, manifest_to_xlsx
+from util.cmr_cache_util import read_cached_cmr_page, write_cached_cmr_page, evict_cmr_cache, get_cmr_page_digest
+from util.catalog_util import open_granule_catalog, save_date_coverage, get_granules_covering
+from util.coverage_util import find_covering_combination, get_polygon, get_footprint, get_footprint_cache_info
 
 try:
     from urllib.parse import urlparse
@@ -224,16 +227,28 @@ def filter_polygons(search_results):
                     for e in search_results['feed']['entry']
                     if 'links' in e]
 
+    # granule id and revision date, for granule catalog
+    producer_granule_id_entries = [e.get('producer_granule_id', e['links'][0]['href'].split('/')[-1])
+                                   for e in search_results['feed']['entry']
+                                   if 'links' in e]
+
+    revision_date_entries = [e.get('updated')
+                             for e in search_results['feed']['entry']
+                             if 'links' in e]
+
     # combine n flat lists into an array: zip
-    polygon_infos = list(zip(time_start_entries, polygon_entries, link_entries))
+    polygon_infos = list(zip(time_start_entries, polygon_entries, link_entries, producer_granule_id_entries,
+                             revision_date_entries))
 
     return polygon_infos
 
 
 def split_polygon_infos_by_date(polygon_infos):
+    # generator: polygon infos may come from several CMR pages, sorted by start date
+    # the polygon infos of the current date are kept as carry-over buffer until the date changes, so that a date
+    # straddling two pages is never split into two date items
     last_date = None
     date_polygon_infos = []
-    polygon_infos_by_date = []
 
     for item in polygon_infos:
 
@@ -242,7 +257,7 @@ def split_polygon_infos_by_date(polygon_infos):
         # all date changes, before last date
         if last_date is not None and date != last_date:
             filename = last_date + '.kml'
-            polygon_infos_by_date.append([last_date, filename, date_polygon_infos])
+            yield [last_date, filename, date_polygon_infos]
             date_polygon_infos = []
 
         date_polygon_infos.append(item)
@@ -250,38 +265,13 @@ def split_polygon_infos_by_date(polygon_infos):
         last_date = date
 
     # process last date
-    filename = last_date + '.kml'
-    polygon_infos_by_date.append([last_date, filename, date_polygon_infos])
-
-    return polygon_infos_by_date
-
-
-def get_all_polygon_combinations(list_of_polygons):
-    # get a list of discrete ascending numbers, e.g. [0, 1, 2, 3, 4] for a list of 5 polygons
-    elements = list(range(len(list_of_polygons)))
-    # get all possible combinations, e.g. [[], [0], [1], [2], [3], [4], [0, 1], [0, 2], [0, 3],...]
-    result = sum([list(map(list, combinations(elements, i))) for i in range(len(elements) + 1)], [])
-    # remove first element, because empty: []
-    result.pop(0)
-
-    return result
-
-
-def get_polygon(coordinate_string):
-    # lat/long NSIDC format
-    n_coords = coordinate_string.split()
-
-    # create polygon (coordinates in lon/lat GIS format)
-    g_coords = [(float(n_coords[1]), float(n_coords[0])), (float(n_coords[3]), float(n_coords[2])),
-                (float(n_coords[5]), float(n_coords[4])),
-                (float(n_coords[7]), float(n_coords[6]))]
+    if last_date is not None:
+        filename = last_date + '.kml'
+        yield [last_date, filename, date_polygon_infos]
 
-    result = Polygon(g_coords)
-    return result
 
-
-def get_bounding_box_coverage_info(bounding_box, polygon_infos_by_date, kml_file_generation):
-    date_set = []
+def get_bounding_box_coverage_info(bounding_box, polygon_infos_by_date, kml_file_generation, granule_catalog=None):
+    # generator: one flattened entry per date, as soon as the date is complete
 
     # bounding box
     coordinate_string = convert_bounding_box_to_coordinate_string(bounding_box)
@@ -291,72 +281,40 @@ def get_bounding_box_coverage_info(bounding_box, polygon_infos_by_date, kml_file
 
         list_of_polygons = single_date[2]
 
-        polygon_combinations = get_all_polygon_combinations(list_of_polygons)
-
-        including_combination = []
-        for combination in polygon_combinations:
-
-            if len(combination) == 1:
-                # check if bounding box is included in primary polygon
-                combination_index = combination[0]
-                coordinate_string = list_of_polygons[combination_index][1]
-                primary_polygon = get_polygon(coordinate_string)
-                bb_is_included = bb_polygon.within(primary_polygon)
-                if bb_is_included:
-                    including_combination = combination
-                    break
-            else:
-                # check if bounding box is included in union of polygons
-                polygons = []
-                polygon_union = None  # necessary?
-                for combination_index in combination:
-                    coordinate_string = list_of_polygons[combination_index][1]
-                    participating_polygon = get_polygon(coordinate_string)
-                    polygons.append(participating_polygon)
-                polygon_union = unary_union(polygons)
-                bb_is_included = bb_polygon.within(polygon_union)
-                if bb_is_included:
-                    including_combination = combination
-                    break
+        # find smallest combination of polygons including the bounding box (no enumeration of all 2^n combinations)
+        # footprints are parsed only once per run and reused as prepared geometries
+        footprints = [get_footprint(polygon_info[1]) for polygon_info in list_of_polygons]
+        including_combination = find_covering_combination(bb_polygon, [footprint[0] for footprint in footprints],
+                                                          [footprint[1] for footprint in footprints])
 
         # add include info to filename, for human readability
         # old: 2021-09-04.kml
         # new: 2021-09-04 ~ 2 from 5 polygons.kml
         filename_parts = single_date[1].split('.')
 
-        item_with_include_info = [single_date[0],
-                                  filename_parts[0] + ' ~ ' + str(len(including_combination)) + ' from ' +
-                                  str(len(single_date[2])) + ' polygons.' + filename_parts[1], single_date[2],
-                                  including_combination]
+        date_entry = [single_date[0],
+                      filename_parts[0] + ' ~ ' + str(len(including_combination)) + ' from ' +
+                      str(len(single_date[2])) + ' polygons.' + filename_parts[1], single_date[2],
+                      including_combination]
 
-        date_set.append(item_with_include_info)
+        # data structures are ready for KML file generation
+        if kml_file_generation is True:
+            generate_kml_files([date_entry])
 
-    # data structures are ready for KML file generation
-    if kml_file_generation is True:
-        generate_kml_files(date_set)
+        # incremental update of granule catalog
+        if granule_catalog is not None:
+            save_date_coverage(granule_catalog, bounding_box, single_date[0], single_date[2], including_combination,
+                               version)
 
-    # flatten date_set for export to Excel: 1 row per date, even if multiple polygons
-    if date_set is not None:
-
-        flattened_entries = []
-        for date_entry in date_set:
-            flattened_entry = [date_entry[0],  # date
-                               date_entry[1],  # KML filename
-                               len(date_entry[3]),  # number of required polygons for coverage
-                               len(date_entry[2]),  # total number of polygons for this date
-                               '|'.join(str(item) for item in date_entry[3]),  # coverage items separated by |
-                               '|'.join(str(item[2]['href']) for item in date_entry[2])]  # coverage urls separated by |
-            flattened_entries.append(flattened_entry)
-
-        # create dataframe
-        flattened_date_set = pd.DataFrame(flattened_entries,
-                                          columns=['date', 'KML filename', 'nb_required_polygons', 'nb_total_polygons',
-                                                   'coverage_item_list', 'coverage_url_list'])
-
-    else:
-        flattened_date_set = None
+        # flatten date entry for selection manifest: 1 row per date, even if multiple polygons
+        flattened_entry = [date_entry[0],  # date
+                           date_entry[1],  # KML filename
+                           len(date_entry[3]),  # number of required polygons for coverage
+                           len(date_entry[2]),  # total number of polygons for this date
+                           list(date_entry[3]),  # coverage items (indexes in url list)
+                           [item[2]['href'] for item in date_entry[2]]]  # coverage urls
 
-    return flattened_date_set
+        yield flattened_entry
 
 
 def convert_bounding_box_to_coordinate_string(bounding_box):
@@ -599,91 +557,236 @@ def generate_kml_files(date_items):
 #     return urls
 ########################################################################################################################
 
-def cmr_search(short_name, version, time_start, time_end,
-               bounding_box='', polygon='', filename_filter=''):
-    """Perform a scrolling CMR query for files matching input criteria."""
-    cmr_query_url = build_cmr_query_url(short_name=short_name, version=version,
-                                        time_start=time_start, time_end=time_end,
-                                        bounding_box=bounding_box,
-                                        polygon=polygon, filename_filter=filename_filter)
-    print('Querying for data:\n\t{0}\n'.format(cmr_query_url))
-
+def cmr_fetch_pages(cmr_query_url):
+    """Yield (hits, raw page) for all pages of a scrolling CMR query, including the final empty page."""
     cmr_scroll_id = None
     ctx = ssl.create_default_context()
     ctx.check_hostname = False
     ctx.verify_mode = ssl.CERT_NONE
 
-    assembled_date_items = None
-
-    try:
-        urls = []
-        while True:
-            req = Request(cmr_query_url)
-            if cmr_scroll_id:
-                req.add_header('cmr-scroll-id', cmr_scroll_id)
-            response = urlopen(req, context=ctx)
-            if not cmr_scroll_id:
-                # Python 2 and 3 have different case for the http headers
-                headers = {k.lower(): v for k, v in dict(response.info()).items()}
-                cmr_scroll_id = headers['cmr-scroll-id']
-                hits = int(headers['cmr-hits'])
+    hits = 0
+    while True:
+        req = Request(cmr_query_url)
+        if cmr_scroll_id:
+            req.add_header('cmr-scroll-id', cmr_scroll_id)
+        response = urlopen(req, context=ctx)
+        if not cmr_scroll_id:
+            # Python 2 and 3 have different case for the http headers
+            headers = {k.lower(): v for k, v in dict(response.info()).items()}
+            cmr_scroll_id = headers['cmr-scroll-id']
+            hits = int(headers['cmr-hits'])
+        raw_page = response.read().decode('utf-8')
+
+        yield hits, raw_page
+
+        search_page = json.loads(raw_page)
+        if 'feed' not in search_page or not search_page['feed'].get('entry'):
+            break
+
+
+def cmr_scroll_pages(cmr_query_url, verbose=True):
+    """Yield (hits, page) for the pages of a scrolling CMR query, one page after the other, from cache if possible.
+
+    All pages come from one CMR scroll: cached pages belong to the snapshot of the first page and expire with it
+    (offline mode: whatever their age). If a page of the cached scroll is missing, a new scroll is started: its first
+    pages must hold the same granules as the pages already replayed from cache, otherwise ValueError is raised.
+    """
+    ttl_seconds = None if CMR_OFFLINE_MODE else CMR_CACHE_TTL_HOURS * 3600
+
+    # network scroll is only started when a page is missing in cache
+    live_pages = None
+    snapshot = None
+    replayed_page_digests = []
+
+    page_number = 0
+    hits = 0
+    while True:
+        cached_page = None
+        if CMR_CACHE_DIRECTORY and live_pages is None:
+            cached_page = read_cached_cmr_page(CMR_CACHE_DIRECTORY, cmr_query_url, page_number, snapshot,
+                                               ttl_seconds if page_number == 0 else None)
+
+        if cached_page is not None:
+            page_hits, raw_page, snapshot = cached_page
+        elif CMR_OFFLINE_MODE:
+            print('Offline mode: page {0} not in CMR cache for query:\n\t{1}'.format(page_number, cmr_query_url))
+            quit()
+        else:
+            if live_pages is None:
+                live_pages = cmr_fetch_pages(cmr_query_url)
+                snapshot = time.time()
+                # a new scroll starts at first page: pages already replayed from cache are fetched again and cached
+                # with the new snapshot; they must be the same (no granule of another CMR snapshot), otherwise the
+                # search fails and the next run starts from the new snapshot
+                for skipped_page_number in range(page_number):
+                    skipped_hits, skipped_page = next(live_pages)
+                    if CMR_CACHE_DIRECTORY:
+                        write_cached_cmr_page(CMR_CACHE_DIRECTORY, cmr_query_url, skipped_page_number, skipped_hits,
+                                              skipped_page, snapshot)
+                    if get_cmr_page_digest(json.loads(skipped_page)) != replayed_page_digests[skipped_page_number]:
+                        raise ValueError('CMR search result changed while cached pages were replayed, '
+                                         'run search again:\n\t' + cmr_query_url)
+            page_hits, raw_page = next(live_pages)
+            if CMR_CACHE_DIRECTORY:
+                write_cached_cmr_page(CMR_CACHE_DIRECTORY, cmr_query_url, page_number, page_hits, raw_page,
+                                      snapshot)
+
+        if page_number == 0:
+            hits = page_hits
+            if verbose:
                 if hits > 0:
-                    print('Found {0} matches.'.format(hits))
+                    print('Found {0} matches{1}.'.format(hits, ' (from cache)' if cached_page is not None else ''))
                 else:
                     print('Found no matches.')
-            search_page = response.read()
-            search_page = json.loads(search_page.decode('utf-8'))
 
-            ############################################################################################################
-            # url_scroll_results = cmr_filter_urls(search_page)
+        search_page = json.loads(raw_page)
+        if cached_page is not None:
+            replayed_page_digests.append(get_cmr_page_digest(search_page))
 
-            # case not handled: hits > CMR_PAGE_SIZE (2000)
-            # url_scroll_results = generate_kml_file(search_page)
+        if 'feed' not in search_page or not search_page['feed'].get('entry'):
+            break
+        if verbose and hits > CMR_PAGE_SIZE:
+            print('..', end='')
+            sys.stdout.flush()
 
-            polygon_infos = filter_polygons(search_page)
-            if polygon_infos:
+        yield hits, search_page
 
-                # split polygon list by date
-                date_items = split_polygon_infos_by_date(polygon_infos)
+        page_number += 1
 
-                # add bounding box coverage info
-                kml_file_generation = True
-                chunk_of_date_items = get_bounding_box_coverage_info(bounding_box, date_items, kml_file_generation)
+    if verbose and hits > CMR_PAGE_SIZE:
+        print()
 
-            else:
-                chunk_of_date_items = None
-
-            ############################################################################################################
-
-            # if not url_scroll_results:
-            if chunk_of_date_items is None:
-                break
-            if hits > CMR_PAGE_SIZE:
-                print('..', end='')
-                sys.stdout.flush()
-
-            # urls += url_scroll_results
-
-            if assembled_date_items is not None:
-                print(
-                    "assembling DataFrame chunks: " + str(assembled_date_items.shape[0]) + " date entries with " + str(
-                        chunk_of_date_items.shape[0]) + " other date entries")
-                # axis=0: concatenate along rows
-                # ignore_index=True: a continuous index value is maintained across the rows in the concatenated data frame
-                assembled_date_items = pd.concat([assembled_date_items, chunk_of_date_items], axis=0, ignore_index=True)
-            else:
-                assembled_date_items = chunk_of_date_items
 
-        if hits > CMR_PAGE_SIZE:
-            print()
+def get_polygon_infos(polygon_info_chunks):
+    # flatten chunks (one chunk per CMR page or per time window) into one stream of polygon infos
+    for polygon_info_chunk in polygon_info_chunks:
+        for polygon_info in polygon_info_chunk:
+            yield polygon_info
+
+        # footprint cache: each footprint should be parsed only once per run
+        cache_info = get_footprint_cache_info()
+        print('footprint cache: {0} parses, {1} hits (hit ratio {2:.0%})'.format(
+            cache_info['parses'], cache_info['hits'], cache_info['hit_ratio']))
+
+
+def get_time_windows(time_start, time_end, hits):
+    # split temporal range into windows of equal duration, so that each window is expected to fit into one CMR page
+    # granules are not evenly distributed over time: CMR_WINDOW_FILL_RATIO leaves some margin
+    number_of_windows = int(math.ceil(hits / (CMR_PAGE_SIZE * CMR_WINDOW_FILL_RATIO)))
+
+    start = datetime.datetime.strptime(time_start, '%Y-%m-%dT%H:%M:%SZ')
+    end = datetime.datetime.strptime(time_end, '%Y-%m-%dT%H:%M:%SZ')
+    window_duration = (end - start) / number_of_windows
 
-        # return urls
-        return assembled_date_items
+    time_windows = []
+    for i in range(number_of_windows):
+        window_start = start + i * window_duration
+        window_end = end if i == number_of_windows - 1 else start + (i + 1) * window_duration
+        time_windows.append([window_start.strftime('%Y-%m-%dT%H:%M:%SZ'), window_end.strftime('%Y-%m-%dT%H:%M:%SZ')])
+
+    return time_windows
+
+
+def cmr_search_window(window_query_url):
+    # worker: all polygon infos of one time window (usually one single CMR page)
+    polygon_infos = []
+    for hits, search_page in cmr_scroll_pages(window_query_url, verbose=False):
+        polygon_infos += filter_polygons(search_page)
+
+    return polygon_infos
+
+
+def cmr_search_windows(window_query_urls):
+    # windows are searched in parallel, but come back in window order, i.e. sorted by start date
+    # CMR temporal search is inclusive: a granule at a window boundary belongs to both windows => skip duplicates
+    previous_hrefs = set()
+    for index, polygon_infos in enumerate(ordered_parallel_map(cmr_search_window, window_query_urls,
+                                                               CMR_SEARCH_WORKERS), start=1):
+        unique_polygon_infos = [polygon_info for polygon_info in polygon_infos
+                                if polygon_info[2]['href'] not in previous_hrefs]
+        previous_hrefs = set(polygon_info[2]['href'] for polygon_info in polygon_infos)
+
+        print('time window {0}/{1}: {2} granules'.format(index, len(window_query_urls), len(unique_polygon_infos)))
+        yield unique_polygon_infos
+
+
+def cmr_search(short_name, version, time_start, time_end,
+               bounding_box='', polygon='', filename_filter='', granule_catalog=None):
+    """Perform a scrolling CMR query for files matching input criteria.
+
+    Generator: pages are processed as they come in, and each date entry is yielded as soon as it is complete.
+    If there are more hits than fit into one CMR page, temporal range is split into windows searched in parallel.
+    """
+    cmr_query_url = build_cmr_query_url(short_name=short_name, version=version,
+                                        time_start=time_start, time_end=time_end,
+                                        bounding_box=bounding_box,
+                                        polygon=polygon, filename_filter=filename_filter)
+    print('Querying for data:\n\t{0}\n'.format(cmr_query_url))
+
+    try:
+        search_pages = cmr_scroll_pages(cmr_query_url)
+        first_page = next(search_pages, None)
+
+        if first_page is None:
+            polygon_info_chunks = []
+        elif first_page[0] <= CMR_PAGE_SIZE:
+            # all hits in one page: sequential scroll
+            polygon_info_chunks = (filter_polygons(search_page)
+                                   for hits, search_page in itertools.chain([first_page], search_pages))
+        else:
+            # hits > CMR_PAGE_SIZE: parallel search by time window
+            search_pages.close()
+            time_windows = get_time_windows(time_start, time_end, first_page[0])
+            print('Splitting search into {0} time windows'.format(len(time_windows)))
+            window_query_urls = [build_cmr_query_url(short_name=short_name, version=version,
+                                                     time_start=time_window[0], time_end=time_window[1],
+                                                     bounding_box=bounding_box,
+                                                     polygon=polygon, filename_filter=filename_filter)
+                                 for time_window in time_windows]
+            polygon_info_chunks = cmr_search_windows(window_query_urls)
+
+        # split polygon stream by date, across page and window boundaries
+        date_items = split_polygon_infos_by_date(get_polygon_infos(polygon_info_chunks))
+
+        # add bounding box coverage info
+        kml_file_generation = True
+        for date_entry in get_bounding_box_coverage_info(bounding_box, date_items, kml_file_generation,
+                                                         granule_catalog):
+            yield date_entry
+
+        if CMR_CACHE_DIRECTORY and not CMR_OFFLINE_MODE:
+            evict_cmr_cache(CMR_CACHE_DIRECTORY, CMR_CACHE_TTL_HOURS * 3600, CMR_CACHE_MAX_SIZE_MB * 1024 * 1024)
 
     except KeyboardInterrupt:
         quit()
 
 
+def catalog_search(time_start, time_end, bounding_box, granule_catalog):
+    """Search granules of previous CMR searches in the local granule catalog (offline), instead of querying CMR.
+
+    Generator: same date entries as cmr_search. The catalog only holds granules found by previous searches: a
+    bounding box or time range outside of them returns no (or incomplete) dates.
+    """
+    granules_df = get_granules_covering(granule_catalog, bounding_box, time_start.split('T')[0],
+                                        time_end.split('T')[0])
+
+    # same temporal filter as CMR search: granules starting between time_start and time_end
+    query_start = datetime.datetime.strptime(time_start, '%Y-%m-%dT%H:%M:%SZ')
+    query_end = datetime.datetime.strptime(time_end, '%Y-%m-%dT%H:%M:%SZ')
+
+    # polygon infos, as built by filter_polygons from CMR search results (sorted by start date)
+    polygon_infos = [(row.time_start, row.polygon, {'href': row.url}, row.producer_granule_id, row.revision_date)
+                     for row in granules_df.itertuples()
+                     if query_start <= datetime.datetime.strptime(row.time_start, '%Y-%m-%dT%H:%M:%S.%fZ') <= query_end]
+    print('{0} granules found in granule catalog'.format(len(polygon_infos)))
+
+    kml_file_generation = True
+    date_items = split_polygon_infos_by_date(polygon_infos)
+    for date_entry in get_bounding_box_coverage_info(bounding_box, date_items, kml_file_generation,
+                                                     granule_catalog):
+        yield date_entry
+
+
 def main():
 
     global short_name, version, time_start, time_end, bounding_box, \
@@ -700,30 +803,48 @@ def main():
     if not os.path.exists(filter_result_directory):
         os.makedirs(filter_result_directory)
 
-    cmr_search_and_filter_time = start_time_measure(">>> starting CMR search and filter...")
-    date_items_found = cmr_search(short_name, version, time_start, time_end,
-                                  bounding_box=bounding_box,
-                                  polygon=polygon, filename_filter=filename_filter)
-    end_time_measure(cmr_search_and_filter_time, '>>> CMR search and filter time: ')
+    ready_for_download_directory = 'B_FILTER_RESULT/B2_READY_FOR_DOWNLOAD'
+    if not os.path.exists(ready_for_download_directory):
+        os.makedirs(ready_for_download_directory)
+
+    downloaded_directory = 'B_FILTER_RESULT/B3_DOWNLOADED'
+    if not os.path.exists(downloaded_directory):
+        os.makedirs(downloaded_directory)
+
+    rasterized_directory = 'B_FILTER_RESULT/B4_RASTERIZED'
+    if not os.path.exists(rasterized_directory):
+        os.makedirs(rasterized_directory)
 
-    if date_items_found is not None:
-        filename = 'selection_from_' + time_start.split('T')[0] + '_to_' + time_end.split('T')[0] + '.xlsx'
+    filename = 'selection_from_' + time_start.split('T')[0] + '_to_' + time_end.split('T')[0] + '.sqlite'
+    filepath = ready_for_download_directory + '/' + filename
 
-        ready_for_download_directory = 'B_FILTER_RESULT/B2_READY_FOR_DOWNLOAD'
-        if not os.path.exists(ready_for_download_directory):
-            os.makedirs(ready_for_download_directory)
+    # granule catalog is updated date by date during search
+    granule_catalog = open_granule_catalog(GRANULE_CATALOG)
 
-        downloaded_directory = 'B_FILTER_RESULT/B3_DOWNLOADED'
-        if not os.path.exists(downloaded_directory):
-            os.makedirs(downloaded_directory)
+    cmr_search_and_filter_time = start_time_measure(">>> starting CMR search and filter...")
+    if CATALOG_SEARCH is True:
+        # offline re-filter (e.g. another bounding box inside the area of previous searches): no CMR query
+        date_items_found = catalog_search(time_start, time_end, bounding_box, granule_catalog)
+    else:
+        date_items_found = cmr_search(short_name, version, time_start, time_end,
+                                      bounding_box=bounding_box,
+                                      polygon=polygon, filename_filter=filename_filter,
+                                      granule_catalog=granule_catalog)
+
+    # each date is written to the selection manifest as soon as it is complete (no file if no date found)
+    number_of_dates = rows_to_manifest(filepath, date_items_found)
+    end_time_measure(cmr_search_and_filter_time, '>>> CMR search and filter time: ')
 
-        rasterized_directory = 'B_FILTER_RESULT/B4_RASTERIZED'
-        if not os.path.exists(rasterized_directory):
-            os.makedirs(rasterized_directory)
+    granule_catalog.close()
 
-        filepath = ready_for_download_directory + '/' + filename
+    if number_of_dates > 0:
+        print(str(number_of_dates) + ' dates saved to: ' + filepath)
 
-        date_items_found.to_excel(filepath, index=False)  # requires openpyxl
+        # optional human-readable copy of the manifest, outside of B2_READY_FOR_DOWNLOAD (not read by steps 02 and 03)
+        if SELECTION_XLSX_EXPORT is True:
+            xlsx_filepath = filter_result_directory + '/' + os.path.splitext(filename)[0] + '.xlsx'
+            manifest_to_xlsx(filepath, xlsx_filepath, SELECTION_COLUMNS)
+            print('selection exported to: ' + xlsx_filepath)
 
 
 if __name__ == '__main__':
@@ -741,6 +862,23 @@ if __name__ == '__main__':
     CMR_URL = 'https://cmr.earthdata.nasa.gov'
     URS_URL = 'https://urs.earthdata.nasa.gov'
     CMR_PAGE_SIZE = 2000
+    # searches with more hits than CMR_PAGE_SIZE are split into time windows, searched by CMR_SEARCH_WORKERS threads
+    CMR_WINDOW_FILL_RATIO = 0.5
+    CMR_SEARCH_WORKERS = 4
+    # CMR response cache: raw JSON pages, keyed by query url + page number ('' to disable cache)
+    CMR_CACHE_DIRECTORY = 'B_FILTER_RESULT/B0_CMR_CACHE'
+    CMR_CACHE_TTL_HOURS = 7 * 24
+    CMR_CACHE_MAX_SIZE_MB = 500
+    # offline mode: replay cached pages, without network access
+    CMR_OFFLINE_MODE = False
+    # granule catalog (SQLite), shared by all searches
+    GRANULE_CATALOG = 'B_FILTER_RESULT/granule_catalog.sqlite'
+    # search granule catalog (R-tree on footprint bounds) instead of CMR: granules found by previous searches only
+    CATALOG_SEARCH = False
+    # selection manifest (SQLite) is read by steps 02 and 03; Excel export is for human inspection only
+    SELECTION_XLSX_EXPORT = False
+    SELECTION_COLUMNS = ['date', 'KML filename', 'nb_required_polygons', 'nb_total_polygons', 'coverage_item_list',
+                         'coverage_url_list']
     CMR_FILE_URL = ('{0}/search/granules.json?provider=NSIDC_ECS'
                     '&sort_key[]=start_date&sort_key[]=producer_granule_id'
                     '&scroll=true&page_size={1}'.format(CMR_URL, CMR_PAGE_SIZE))
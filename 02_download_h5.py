@@ -9,8 +9,10 @@ Last changed on.. 02.05.2022
 """
 
 import os
-from util.file_util import xlsx_to_dataframe
+from util.file_util import read_selection
 from util.cmr_util import cmr_download
+from util.granule_store_util import open_granule_store, find_granule, add_granule, reference_granules, \
+    evict_granule_store
 from util.performance_util import start_time_measure, end_time_measure
 import glob
 import shutil
@@ -21,7 +23,7 @@ import shutil
 # =COUNTA(E2:E718)	        cells not empty
 
 
-def smap_download_with_filter(selection_file, download_result_directory, polygon_selection_mode):
+def smap_download_with_filter(selection_file, granule_store, polygon_selection_mode):
 
     # POLYGONS_COVERING_BOUNDING_BOX = False
     # ALL_POLYGONS = True
@@ -29,7 +31,8 @@ def smap_download_with_filter(selection_file, download_result_directory, polygon
 
     # dataframe value columns:
     # ['date', 'items', 'urls']
-    df = xlsx_to_dataframe(selection_file)
+    # selection manifest (SQLite) written by step 01; Excel files of older selections are still accepted
+    df = read_selection(selection_file)
 
     url_list = []
 
@@ -44,10 +47,38 @@ def smap_download_with_filter(selection_file, download_result_directory, polygon
             for item_index in row[1]:  # row[1] means row['items']
                 url_list.append(row[2][int(item_index)])  # row[2][n] means nth element of row['urls']
 
+    # same granule may be listed for several dates: each url only once, in selection order
+    url_list = list(dict.fromkeys(url_list))
+    granule_ids = [url.split('/')[-1] for url in url_list]  # h5 filename is last term of url
+
+    # granules already in store (downloaded for another selection file or project) are not downloaded again
+    # partial granules (slim files) are enough, unless complete granules are requested
+    missing_urls = [url for url, granule_id in zip(url_list, granule_ids)
+                    if find_granule(granule_store, GRANULE_STORE_DIRECTORY, granule_id,
+                                    allow_partial=PARTIAL_DOWNLOAD) is None]
+    print('{0} granules selected, {1} already in granule store'.format(len(url_list),
+                                                                      len(url_list) - len(missing_urls)))
+
     download_time = start_time_measure(">>> " + selection_file + " - starting h5 download...")
-    cmr_download(url_list, download_result_directory)
+    # partial download: only h5 objects used by step 03 are fetched, with HTTP Range requests
+    h5_object_paths = PARTIAL_DOWNLOAD_H5_OBJECTS if PARTIAL_DOWNLOAD is True else None
+    incoming_directory = GRANULE_STORE_DIRECTORY + '/incoming'
+    cmr_download(missing_urls, incoming_directory, DOWNLOAD_WORKERS, h5_object_paths)
     end_time_measure(download_time, ">>> " + selection_file + " - download time: ")
 
+    # verified downloads are moved into store (failed downloads stay in incoming directory, to be resumed)
+    for url in missing_urls:
+        granule_id = url.split('/')[-1]
+        filepath = incoming_directory + '/' + granule_id
+        if os.path.exists(filepath):
+            add_granule(granule_store, GRANULE_STORE_DIRECTORY, granule_id, filepath, url, PARTIAL_DOWNLOAD)
+
+    stored_granule_ids = [granule_id for granule_id in granule_ids
+                          if find_granule(granule_store, GRANULE_STORE_DIRECTORY, granule_id) is not None]
+    reference_granules(granule_store, PROJECT_NAME, stored_granule_ids)
+
+    return granule_ids
+
 
 def main():
 
@@ -57,19 +88,30 @@ def main():
     ready_for_download_directory = 'B_FILTER_RESULT/B2_READY_FOR_DOWNLOAD'
     downloaded_directory = 'B_FILTER_RESULT/B3_DOWNLOADED'
 
-    # check for existence of directory for DOWNLOAD results
-    download_result_directory = 'C_DOWNLOAD_RESULT'
-    if not os.path.exists(download_result_directory):
-        os.makedirs(download_result_directory)
+    # granules are downloaded to the granule store, shared by all projects (watersheds)
+    granule_store = open_granule_store(GRANULE_STORE_DIRECTORY)
+    incoming_directory = GRANULE_STORE_DIRECTORY + '/incoming'
+    if not os.path.exists(incoming_directory):
+        os.makedirs(incoming_directory)
+
+    # selection manifests (*.sqlite) and older Excel selection files (*.xlsx)
+    selection_files = []
+    for search_criteria in ['*.sqlite', '*.xlsx']:
+        query = os.path.join(ready_for_download_directory, search_criteria)
+        selection_files += glob.glob(query)
+
+    # granules of all selection files of this run are kept until step 03 has converted them
+    run_granule_ids = []
+    for selection_file in selection_files:
+        run_granule_ids += smap_download_with_filter(selection_file, granule_store, ALL_POLYGONS)
+        target_path = downloaded_directory + '/' + os.path.basename(selection_file)
+        shutil.move(selection_file, target_path)
 
-    search_criteria = '*.xlsx'
-    query = os.path.join(ready_for_download_directory, search_criteria)
-    selection_files = glob.glob(query)
+    # eviction once, after all downloads: granules referenced by any project are never evicted
+    evict_granule_store(granule_store, GRANULE_STORE_DIRECTORY, GRANULE_STORE_MAX_SIZE_MB * 1024 * 1024,
+                        keep_granule_ids=run_granule_ids)
 
-    for xlsx_file in selection_files:
-        smap_download_with_filter(xlsx_file, download_result_directory, ALL_POLYGONS)
-        target_path = downloaded_directory + '/' + xlsx_file.split('\\')[-1]
-        shutil.move(xlsx_file, target_path)
+    granule_store.close()
 
 
 if __name__ == '__main__':
@@ -77,5 +119,16 @@ if __name__ == '__main__':
     # constants
     POLYGONS_COVERING_BOUNDING_BOX = False
     ALL_POLYGONS = True
+    # parallel downloads, sharing one authenticated cookie session
+    DOWNLOAD_WORKERS = 4
+    # slim h5 files (same paths as original granules), instead of complete granules
+    PARTIAL_DOWNLOAD = False
+    PARTIAL_DOWNLOAD_H5_OBJECTS = ['Soil_Moisture_Retrieval_Data_1km/soil_moisture_1km', 'Metadata/Extent',
+                                   'Soil_Moisture_Retrieval_Data_1km/EASE_row_index_1km',
+                                   'Soil_Moisture_Retrieval_Data_1km/EASE_column_index_1km']
+    # granule store: content-addressed h5 files shared by all projects, least recently used granules are evicted
+    GRANULE_STORE_DIRECTORY = os.path.join(os.path.expanduser('~'), 'SMAP_GRANULE_STORE')
+    GRANULE_STORE_MAX_SIZE_MB = 20000
+    PROJECT_NAME = os.path.basename(os.path.abspath('.'))
 
     main()
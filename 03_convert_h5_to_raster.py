@@ -9,102 +9,183 @@ Last changed on.. 02.05.2022
 """
 
 import os
-from util.file_util import xlsx_to_dataframe
+from util.file_util import read_selection
+from util.gis_util import get_bounding_box_from_shp
 import h5py
 import numpy as np
-from osgeo import gdal, osr
-import rasterio
+from rasterio.io import MemoryFile
 from rasterio.merge import merge
+from rasterio.transform import Affine
 import glob
-from util.performance_util import start_time_measure, end_time_measure
-from util.file_util import delete_complete_directory
+from util.performance_util import start_time_measure, end_time_measure, ordered_parallel_map
+from concurrent.futures import ProcessPoolExecutor
+from util.granule_store_util import open_granule_store, find_granule, reference_granules
+from util.datacube_util import get_datacube_grid, create_datacube, append_to_datacube, regrid_nearest, \
+    read_datacube_dates
+from util.build_manifest_util import open_build_manifest, get_file_fingerprint, get_fingerprint, is_up_to_date, \
+    is_built_empty, record_build
+from util.raster_util import FILL_VALUE, SOIL_MOISTURE_SCALE_FACTOR, write_raster
+from util.ease2_util import get_ease2_tile, get_target_grid, get_lookup_table, get_source_window, resample_to_grid
 import shutil
 
 
 # How to fix the reprojection from EASE-2 grid product SMAP to geographic coordinates?
 # https://gis.stackexchange.com/questions/253923/how-to-fix-the-reprojection-from-ease-2-grid-product-smap-to-geographic-coordina
-def h5_band_to_raster(filepath_in, band, filepath_out):
-
+def read_h5_bands(filepath_in, bands, resolution, aoi=None, quality_filter=None):
+
+    # returns (float32 array (band, row, column), GDAL geotransform) on WGS84 grid of resolution (degrees), None if
+    # h5 file is not found (or cannot be read), () if it does not cover AOI (no raster, see convert_date); all bands (and quality flags) are read while the h5 file is open
+    # EASE-2 pixels are resampled (nearest pixel) with a lookup table, computed once per (EASE-2 tile, target grid)
+    # only the hyperslab of EASE-2 pixels used by the target grid (covering the AOI) is read
+    # quality_filter: (quality flag dataset, bit mask) -> pixels with any of these bits set (or without flags) are
+    # set to FILL_VALUE in all bands
     try:
         h5_file = h5py.File(filepath_in, 'r')
     except:
         h5_file = None
         print('Filepath not found: ', filepath_in)
 
-    if h5_file:
-        data = h5_file.get(band)
+    if not h5_file:
+        return None
 
-        extent = h5_file["/Metadata/Extent"]
-        coords = extent.attrs['polygonPosList']
-        lat = [coords[0], coords[4]]
-        lon = [coords[1], coords[3]]
+    with h5_file:
+        tile = get_ease2_tile(h5_file, h5_file[bands[0]].shape)
+        target_grid = get_target_grid(tile, resolution, aoi)
+        lookup_table = get_lookup_table(tile, *target_grid) if target_grid is not None else None
+        window = get_source_window(lookup_table) if lookup_table is not None else None
+        if window is None:
+            print('No pixel within area of interest: ', filepath_in)
+            return ()
+        row_start, row_stop, col_start, col_stop = window
 
-        np_data = np.array(data)
-        np_lat = np.array(lat)
-        np_lon = np.array(lon)
+        np_window = np.empty((len(bands), row_stop - row_start, col_stop - col_start), dtype=np.float32)
+        for band_index, band in enumerate(bands):
+            np_window[band_index] = h5_file[band][row_start:row_stop, col_start:col_stop]
 
-        xmin = np_lon.min()
-        xmax = np_lon.max()
-        ymin = np_lat.min()
-        ymax = np_lat.max()
+        if quality_filter is not None:
+            quality_flag_dataset, quality_flag_bits = quality_filter
+            quality_flags = h5_file[quality_flag_dataset]
+            flags = quality_flags[row_start:row_stop, col_start:col_stop]
 
-        nrows, ncols = np_data.shape
-        xres = (xmax - xmin) / float(ncols)
-        yres = (ymax - ymin) / float(nrows)
-        geotransform = (xmin, xres, 0, ymax, 0, -yres)
+            # vectorized bit test on whole window; pixels without flags (fill value) are rejected too
+            rejected = (flags & quality_flag_bits) != 0
+            if '_FillValue' in quality_flags.attrs:
+                rejected |= flags == quality_flags.attrs['_FillValue']
+            np_window[:, rejected] = FILL_VALUE
 
-        output_raster = gdal.GetDriverByName('GTiff').Create(filepath_out, ncols, nrows, 1,
-                                                             gdal.GDT_Float32)  # open tif file
-        output_raster.SetGeoTransform(geotransform)
-        srs = osr.SpatialReference()
-        srs.ImportFromEPSG(4326)  # <-- check if this is a constant!
+    np_data = resample_to_grid(np_window, window, lookup_table, FILL_VALUE)
 
-        output_raster.SetProjection(srs.ExportToWkt())
-        output_raster.GetRasterBand(1).WriteArray(np_data)  # writes array to raster
+    return np_data, target_grid[0]
 
 
-# Creating a raster mosaic
-# https://automating-gis-processes.github.io/CSC18/lessons/L6/raster-mosaic.html
-def merge_rasters(directory_in, filepath_out):
+def h5_bands_to_raster(filepath_in, bands, filepath_out, resolution, aoi=None, quality_filter=None, scales=None):
 
-    # set search criteria to select all tif files
-    search_criteria = '*.tif'
+    # 1 raster band per h5 band, in order of bands; scales: one per band for scaled int16 raster (see write_raster)
+    # returns (numpy array, GDAL geotransform) written to filepath_out, or None / () (see read_h5_bands)
+    h5_bands = read_h5_bands(filepath_in, bands, resolution, aoi, quality_filter)
 
-    query = os.path.join(directory_in, search_criteria)
+    if h5_bands:
+        np_data, geotransform = h5_bands
+        write_raster(filepath_out, np_data, Affine.from_gdal(*geotransform), 'EPSG:4326', scales, bands)
 
-    files = glob.glob(query)
+    return h5_bands
 
-    src_files_to_mosaic = []
 
-    for file in files:
-        src = rasterio.open(file)
+# Creating a raster mosaic
+# https://automating-gis-processes.github.io/CSC18/lessons/L6/raster-mosaic.html
+def merge_h5_bands(filepaths_in, bands, filepath_out, resolution, aoi=None, quality_filter=None, scales=None):
+
+    # granules are read into in-memory float32 datasets: only the mosaic is written to disk (see write_raster)
+    # returns (numpy array, GDAL geotransform) of mosaic, or None, or () if no h5 file covers AOI
+    merged_bands = None
+    memory_files = []
+    src_files_to_mosaic = []
+    number_of_unread_files = 0
+
+    for filepath_in in filepaths_in:
+        h5_bands = read_h5_bands(filepath_in, bands, resolution, aoi, quality_filter)
+        if h5_bands is None:
+            number_of_unread_files += 1
+        if not h5_bands:
+            continue
+
+        np_data, geotransform = h5_bands
+        number_of_bands, nrows, ncols = np_data.shape
+        memory_file = MemoryFile()
+        with memory_file.open(driver='GTiff', height=nrows, width=ncols, count=number_of_bands, dtype='float32',
+                              crs='EPSG:4326', transform=Affine.from_gdal(*geotransform), nodata=FILL_VALUE) as dataset:
+            dataset.write(np_data)
+        memory_files.append(memory_file)
+
+        src = memory_file.open()
         src_files_to_mosaic.append(src)
-        out_meta = src.meta.copy()
+
+    if not src_files_to_mosaic and number_of_unread_files == 0:
+        return ()
 
     # merge function returns a single mosaic array and the transformation info
     try:
-        mosaic, out_trans = merge(datasets=src_files_to_mosaic, method="max")
-
-        # show(mosaic, cmap='terrain')
-
-        # update metadata
-        out_meta.update({"driver": "GTiff",
-                         "height": mosaic.shape[1],
-                         "width": mosaic.shape[2],
-                         "transform": out_trans,
-                         "crs": "+proj=utm +zone=35 +ellps=GRS80 +units=m +no_defs "
-                         }
-                        )
-
-        # write mosaic raster to disk
-        with rasterio.open(filepath_out, "w", **out_meta) as dest:
-            dest.write(mosaic)
+        # datasets as positional argument (keyword renamed from 'datasets' to 'sources' in rasterio 1.4)
+        mosaic, out_trans = merge(src_files_to_mosaic, method="max")
+
+        # write mosaic raster to disk (crs of granule rasters: EPSG:4326)
+        write_raster(filepath_out, mosaic, out_trans, 'EPSG:4326', scales, bands)
+        merged_bands = mosaic, out_trans.to_gdal()
     except:
         print("Mosaic merge failed for: " + filepath_out)
+    finally:
+        for src in src_files_to_mosaic:
+            src.close()
+        for memory_file in memory_files:
+            memory_file.close()
+
+    return merged_bands
+
+
+def get_h5_filepath(granule_store, h5_filename, download_result_directory):
+
+    # granule store first (see 02_download_h5.py), then granules downloaded before the store was introduced
+    h5_filepath = find_granule(granule_store, GRANULE_STORE_DIRECTORY, h5_filename)
+    if h5_filepath is None:
+        h5_filepath = download_result_directory + '/' + h5_filename
+    else:
+        reference_granules(granule_store, PROJECT_NAME, [h5_filename])
+
+    return h5_filepath
+
 
+def convert_date(date_task):
 
-def convert_h5_files_to_rasters(selection_file, band, download_result_directory, raster_result_directory,
-                                raster_temp_directory, polygon_selection_mode):
+    # date task: (date, [(h5 filename, h5 filepath), ...], bands, raster result directory, area of interest,
+    #             raster resolution, quality filter, band scales (or None), datacube grid (geotransform, shape) or None)
+    # all parameters are passed explicitly: worker processes do not see the constants of __main__
+    date, h5_files, bands, raster_result_directory, aoi, resolution, quality_filter, scales, datacube_grid = date_task
+    tif_filepath = raster_result_directory + '/' + date + ".tif"  # <date>.tif
+
+    date_bands = None
+    if len(h5_files) == 1:
+        # convert this h5 file to raster and save with name <current date>.tif
+        date_bands = h5_bands_to_raster(h5_files[0][1], bands, tif_filepath, resolution, aoi, quality_filter, scales)
+
+    elif len(h5_files) > 1:
+        # merge all h5 files of this date in memory, in h5 filename order
+        date_bands = merge_h5_bands([h5_filepath for h5_filename, h5_filepath in sorted(h5_files)], bands,
+                                    tif_filepath, resolution, aoi, quality_filter, scales)
+
+    # datacube layer (first band) is returned to main process (single writer of datacube file)
+    datacube_layer = None
+    if datacube_grid is not None and date_bands:
+        datacube_layer = regrid_nearest(date_bands[0][0], date_bands[1], datacube_grid[0], datacube_grid[1])
+
+    # no h5 file of this date covers AOI: no raster, recorded as built empty (see convert_h5_files_to_rasters)
+    is_empty = date_bands == ()
+
+    return date, len(h5_files), bool(date_bands), is_empty, datacube_layer
+
+
+def convert_h5_files_to_rasters(selection_file, bands, download_result_directory, raster_result_directory,
+                                polygon_selection_mode, resolution, aoi=None, quality_filter=None, scales=None,
+                                datacube_grid=None):
 
     conversion_time = start_time_measure(">>> " + selection_file + " - starting file conversion...")
 
@@ -114,68 +195,86 @@ def convert_h5_files_to_rasters(selection_file, band, download_result_directory,
 
     # dataframe value columns:
     # ['date', 'items', 'urls']
-    df = xlsx_to_dataframe(selection_file)
+    # selection manifest (SQLite) written by step 01; Excel files of older selections are still accepted
+    df = read_selection(selection_file)
+
+    granule_store = open_granule_store(GRANULE_STORE_DIRECTORY)
 
-    # convert dataframe to list and loop to process h5 files according to column 'items'
+    # build manifest: dates whose raster was built from the same h5 files and parameters are not converted again
+    build_manifest = open_build_manifest(raster_result_directory)
+    build_fingerprints = {}
+    number_of_up_to_date_dates = 0
+    datacube_dates_done = set(read_datacube_dates(DATACUBE_FILEPATH)) if datacube_grid is not None else set()
+
+    # convert dataframe to list and build 1 task per date, according to column 'items'
+    date_tasks = []
     for row in df.values.tolist():
 
-        # number of h5 files
         if use_all_polygons:
-            number_of_h5_files = len(row[2])  # all h5 files for this date
+            urls = row[2]  # all h5 files for this date
         else:
-            number_of_h5_files = len(row[1])  # only those h5 files needed to cover bounding box
-
-        if number_of_h5_files == 1:
+            urls = [row[2][int(item_index)] for item_index in row[1]]  # only those needed to cover bounding box
 
-            # index of single polygon to use
-            if use_all_polygons:
-                single_polygon_index = 0
-            else:
-                single_polygon_index = int(row[1][0])
-
-            # convert this h5 file to raster and save with name <current date>.tif
-            url = row[2][single_polygon_index]  # the unique url to process for this date
+        h5_files = []
+        for url in urls:
             h5_filename = url.split('/')[-1]  # h5 filename is last term of url
-            h5_filepath = download_result_directory + '/' + h5_filename
-            date = row[0]
-            tif_filepath = raster_result_directory + '/' + date + ".tif"  # <date>.tif
-            h5_band_to_raster(h5_filepath, band, tif_filepath)
-
-        elif number_of_h5_files > 1:
-
-            # check for existence of directory for RASTER TEMP processing
-            if not os.path.exists(raster_temp_directory):
-                # if TEMP directory does not exist, create it
-                os.makedirs(raster_temp_directory)
-            else:
-                # if TEMP directory is not empty, delete all files
-                if len(os.listdir(raster_temp_directory)) != 0:
-                    for filename in os.listdir(raster_temp_directory):
-                        os.remove(os.path.join(raster_temp_directory, filename))
-
-            if use_all_polygons:
-                # convert all h5 files listed in column "urls" to rasters, and save them to TEMP directory
-                for url in row[2]:  # row['urls']
-                    h5_filename = url.split('/')[-1]  # h5 filename is last term of url
-                    h5_filepath = download_result_directory + '/' + h5_filename
-                    date = row[0]
-                    temp_tif_filepath = raster_temp_directory + '/' + h5_filename.split('.')[
-                        0] + ".tif"  # <h5 filename>.tif
-                    h5_band_to_raster(h5_filepath, band, temp_tif_filepath)  # write into TEMP directory
-            else:
-                # convert all h5 files indexed row[1] to rasters, and save them to TEMP directory
-                for item_index in row[1]:  # row[1] means row['items']
-                    url = row[2][int(item_index)]  # row[2][n] means nth element of row['urls']
-                    h5_filename = url.split('/')[-1]  # h5 filename is last term of url
-                    h5_filepath = download_result_directory + '/' + h5_filename
-                    date = row[0]
-                    temp_tif_filepath = raster_temp_directory + '/' + h5_filename.split('.')[
-                        0] + ".tif"  # <h5 filename>.tif
-                    h5_band_to_raster(h5_filepath, band, temp_tif_filepath)  # write into TEMP directory
-
-            # for this date, merge all rasters of TEMP directory
-            tif_filepath = raster_result_directory + '/' + date + ".tif"  # <date>.tif
-            merge_rasters(raster_temp_directory, tif_filepath)
+            h5_files.append((h5_filename, get_h5_filepath(granule_store, h5_filename, download_result_directory)))
+
+        if h5_files:
+            # inputs of <date>.tif: h5 files (granule id, size, modification time) + conversion parameters
+            build_inputs = {'granules': [[h5_filename] + get_file_fingerprint(h5_filepath)[1:]
+                                         for h5_filename, h5_filepath in sorted(h5_files)],
+                            'bands': bands, 'aoi': aoi, 'resolution': resolution, 'quality_filter': quality_filter,
+                            'scales': scales}
+            fingerprint = get_fingerprint(build_inputs)
+            tif_filepath = raster_result_directory + '/' + row[0] + '.tif'
+            # dates without AOI pixels have neither raster nor datacube layer: skipped until their inputs change
+            if is_up_to_date(build_manifest, tif_filepath, fingerprint) and \
+                    (datacube_grid is None or row[0] in datacube_dates_done or
+                     is_built_empty(build_manifest, tif_filepath, fingerprint)):
+                number_of_up_to_date_dates += 1
+                continue
+            build_fingerprints[row[0]] = fingerprint, build_inputs
+
+            date_tasks.append((row[0], h5_files, bands, raster_result_directory, aoi, resolution, quality_filter,
+                               scales, datacube_grid))
+
+    granule_store.close()
+
+    if number_of_up_to_date_dates > 0:
+        print('{0} dates up to date (not converted again)'.format(number_of_up_to_date_dates))
+
+    # dates are independent: with CONVERSION_WORKERS > 1, they are converted by a process pool
+    # results come back in date order (ordered progress), output files are the same as with 1 worker
+    if CONVERSION_WORKERS > 1:
+        converted_dates = ordered_parallel_map(convert_date, date_tasks, CONVERSION_WORKERS,
+                                               executor_class=ProcessPoolExecutor)
+    else:
+        converted_dates = map(convert_date, date_tasks)
+
+    number_of_dates = len(date_tasks)
+    datacube_dates = []
+    datacube_layers = []
+    for index, (date, number_of_h5_files, is_converted, is_empty, datacube_layer) in enumerate(converted_dates,
+                                                                                                start=1):
+        print('{0}/{1}: {2}.tif ({3} h5 files)'.format(str(index).zfill(len(str(number_of_dates))), number_of_dates,
+                                                       date, number_of_h5_files))
+
+        # main process is the only writer of build manifest
+        if is_converted or is_empty:
+            record_build(build_manifest, raster_result_directory + '/' + date + '.tif', *build_fingerprints[date],
+                         is_empty=is_empty)
+
+        # datacube layers are appended by batches of DATACUBE_APPEND_BATCH dates
+        if datacube_layer is not None:
+            datacube_dates.append(date)
+            datacube_layers.append(datacube_layer)
+        if len(datacube_dates) >= DATACUBE_APPEND_BATCH or (index == number_of_dates and datacube_dates):
+            append_to_datacube(DATACUBE_FILEPATH, datacube_dates, datacube_layers)
+            datacube_dates = []
+            datacube_layers = []
+
+    build_manifest.close()
 
     end_time_measure(conversion_time, ">>> " + selection_file + " - file conversion: ")
 
@@ -184,14 +283,22 @@ def main():
 
     global POLYGONS_COVERING_BOUNDING_BOX, ALL_POLYGONS
 
-    # band to extract and to convert to GTiff
-    band_of_interest = 'Soil_Moisture_Retrieval_Data_1km/soil_moisture_1km'
+    # bands to extract and to convert to GTiff (band 1 is read by later steps)
+    bands_of_interest = BANDS
+
+    # quality filter: pixels with any of QUALITY_FLAG_BITS set in QUALITY_FLAG_DATASET are set to FILL_VALUE
+    quality_filter = (QUALITY_FLAG_DATASET, QUALITY_FLAG_BITS) if QUALITY_FLAG_BITS != 0 else None
+
+    # soil moisture bands stored as scaled int16 (other bands: scale 1, float32 if values do not fit into int16)
+    scales = None
+    if RASTER_SCALED_INT16 is True:
+        scales = [SOIL_MOISTURE_SCALE_FACTOR if 'soil_moisture' in band else 1.0 for band in bands_of_interest]
 
     # directory B_FILTER_RESULT/B3_DOWNLOADED must have been created in a previous step
     downloaded_directory = 'B_FILTER_RESULT/B3_DOWNLOADED'
     rasterized_directory = 'B_FILTER_RESULT/B4_RASTERIZED'
 
-    # directory for DOWNLOAD results must have been created in a previous step
+    # h5 files are read from granule store; directory for DOWNLOAD results holds granules of older runs
     # download_result_directory = 'C_DOWNLOAD_RESULT'
     download_result_directory = 'C_DOWNLOAD_RESULT_ALL'
 
@@ -200,21 +307,41 @@ def main():
     if not os.path.exists(raster_result_directory):
         os.makedirs(raster_result_directory)
 
-    # 03_RASTER_RESULT/TEMP directory is used to gather all rasters of one day that need to be merged
-    raster_temp_directory = 'D_RASTER_RESULT/TEMP'
+    # area of interest (AOI): bounding box + buffer, rasters are cropped to the AOI
+    aoi = None
+    if AOI_CROP is True:
+        bounding_box = AOI_BOUNDING_BOX
+        if bounding_box == '':
+            # bounding box of SHP file (network), as in step 01
+            bounding_box = get_bounding_box_from_shp('A_BOUNDING_BOX_INPUT')
+        if bounding_box:
+            min_lon, min_lat, max_lon, max_lat = [float(value) for value in bounding_box.split(',')]
+            aoi = (min_lon - AOI_BUFFER_DEGREES, min_lat - AOI_BUFFER_DEGREES,
+                   max_lon + AOI_BUFFER_DEGREES, max_lat + AOI_BUFFER_DEGREES)
+        else:
+            print('No bounding box found: rasters are not cropped')
 
-    search_criteria = '*.xlsx'
-    query = os.path.join(downloaded_directory, search_criteria)
-    selection_files = glob.glob(query)
+    # optional datacube (date, y, x) on a common grid covering the AOI, in addition to <date>.tif files
+    datacube_grid = None
+    if WRITE_DATACUBE is True:
+        if aoi is None:
+            print('No area of interest: datacube is not written')
+        else:
+            datacube_grid = get_datacube_grid(aoi, DATACUBE_RESOLUTION_DEGREES)
+            create_datacube(DATACUBE_FILEPATH, datacube_grid[0], datacube_grid[1])
 
-    for xlsx_file in selection_files:
-        convert_h5_files_to_rasters(xlsx_file, band_of_interest, download_result_directory, raster_result_directory,
-                                    raster_temp_directory, ALL_POLYGONS)  # <-- adapt this, if needed
-        target_path = rasterized_directory + '/' + xlsx_file.split('\\')[-1]
-        shutil.move(xlsx_file, target_path)
+    # selection manifests (*.sqlite) and older Excel selection files (*.xlsx)
+    selection_files = []
+    for search_criteria in ['*.sqlite', '*.xlsx']:
+        query = os.path.join(downloaded_directory, search_criteria)
+        selection_files += glob.glob(query)
 
-    # finally, delete TEMP directory
-    delete_complete_directory(raster_temp_directory)
+    for selection_file in selection_files:
+        convert_h5_files_to_rasters(selection_file, bands_of_interest, download_result_directory,
+                                    raster_result_directory, ALL_POLYGONS, RASTER_RESOLUTION_DEGREES, aoi,
+                                    quality_filter, scales, datacube_grid)  # <-- adapt this, if needed
+        target_path = rasterized_directory + '/' + os.path.basename(selection_file)
+        shutil.move(selection_file, target_path)
 
 
 if __name__ == '__main__':
@@ -222,5 +349,28 @@ if __name__ == '__main__':
     # constants
     POLYGONS_COVERING_BOUNDING_BOX = False
     ALL_POLYGONS = True
+    # granule store, see 02_download_h5.py
+    GRANULE_STORE_DIRECTORY = os.path.join(os.path.expanduser('~'), 'SMAP_GRANULE_STORE')
+    PROJECT_NAME = os.path.basename(os.path.abspath('.'))
+    # dates converted in parallel (processes), 1 for serial conversion
+    CONVERSION_WORKERS = os.cpu_count() or 1
+    # EASE-2 pixels (~1 km) are resampled to a WGS84 grid (EPSG:4326) of this resolution
+    RASTER_RESOLUTION_DEGREES = 0.01
+    # compressed, tiled rasters with overviews (COG); soil moisture stored as int16 (see util/raster_util.py)
+    RASTER_SCALED_INT16 = True
+    # crop rasters to area of interest: bounding box ('' for bounding box of SHP file) + buffer (degrees)
+    AOI_CROP = True
+    AOI_BOUNDING_BOX = ''
+    AOI_BUFFER_DEGREES = 0.05
+    # h5 datasets written to raster bands, e.g. + 'Soil_Moisture_Retrieval_Data_1km/soil_moisture_std_dev_1km'
+    BANDS = ['Soil_Moisture_Retrieval_Data_1km/soil_moisture_1km']
+    # quality flag bits (0: no filter), e.g. 1 = bit 0 'Retrieval_recommended_flag' set (retrieval not recommended)
+    QUALITY_FLAG_DATASET = 'Soil_Moisture_Retrieval_Data_1km/retrieval_qual_flag_1km'
+    QUALITY_FLAG_BITS = 0
+    # datacube: all dates in one HDF5 file (see util/datacube_util.py), read by time series instead of per date
+    WRITE_DATACUBE = False
+    DATACUBE_FILEPATH = 'D_RASTER_RESULT/datacube.h5'
+    DATACUBE_RESOLUTION_DEGREES = 0.01
+    DATACUBE_APPEND_BATCH = 128
 
     main()
@@ -14,115 +14,145 @@ import pandas as pd
 import geopandas as gpd
 import rasterio
 import numpy as np
-from util.sqlite_util import read_sqlite_table
-from pandasql import sqldf
+from util.sqlite_util import read_sqlite_table, read_sqlite_dates, read_sqlite_table_chunks
+from util.raster_util import FILL_VALUE, read_raster_band
+from util.calendar_util import get_day_ordinals, day_ordinals_to_strings
+from util.hru_pixel_util import open_hru_pixel_cache, get_cached_hru_pixels, get_cached_hru_pixel_weights, \
+    get_zonal_means, print_hru_pixel_cache_stats
 
 
-def read_point_values_from_raster(date, raster_result_directory, hru_shape_file):
-
-    hru_values = []
+def read_point_values_from_raster(date, raster_result_directory, hru_shape_file, hru_pixel_cache):
 
+    # returns values of HRUs (float32 array, HRU order of hru_shape_file)
     try:
-        # open raster file
-        raster = rasterio.open(raster_result_directory + '/' + date + '.tif')
-
-        # extract point value from raster
-        for i, point in enumerate(hru_shape_file['geometry']):
-            x = point.xy[0][0]
-            y = point.xy[1][0]
-            row, col = raster.index(x, y)
-            point_value = raster.read(1)[row, col]
-            hru = hru_shape_file['HRU'][i]
-            hru_values.append([hru, point_value])
+        # open raster file and read band once (rasters of step 03 may hold scaled int16 values)
+        with rasterio.open(raster_result_directory + '/' + date + '.tif') as raster:
+            raster_values = read_raster_band(raster)
+            # HRU pixel indexes are computed once per raster grid (transform, shape)
+            unique_pixels, hru_pixel_indexes, is_inside = get_cached_hru_pixels(hru_pixel_cache, raster.transform,
+                                                                                raster.shape, hru_shape_file)
+
+        # extract point values from raster (fancy indexing); HRUs outside of raster get no data value
+        pixel_values = raster_values.ravel()[unique_pixels]
+        hru_values = np.where(is_inside, pixel_values[hru_pixel_indexes], FILL_VALUE).astype(np.float32)
     except:
         # it is possible that raster exists, but that raster read fails during read => then reset hru_values!
-        hru_values = []
-        for hru in hru_shape_file['HRU']:
-            hru_values.append([hru, 0])
+        hru_values = np.zeros(hru_shape_file.shape[0], dtype=np.float32)
 
     return hru_values
 
 
-def get_date(*columns):
+def read_zonal_values_from_rasters(dates, raster_result_directory, hru_ids, hru_pixel_cache, hru_polygon_path,
+                                   hru_polygons):
 
-    return str(int(columns[0])) + '-' + str(int(columns[1])).zfill(2) + '-' + str(int(columns[2])).zfill(2)
+    # area-weighted mean of pixels covered by HRU polygons (no data pixels excluded), for all dates: float32 array
+    # (date x HRU), dates in order of dates and HRUs in order of hru_ids
+    # rasters are grouped by grid (transform, shape): HRU means of a batch of dates of one grid come from one sparse
+    # matrix product (HRU x pixel weights @ pixel x date values), see get_zonal_means
+    # raster read fails => zero for all HRUs (same as point values)
+    date_hru_values = np.zeros((len(dates), len(hru_ids)), dtype=np.float32)
+    grids = {}
 
+    def compute_zonal_means(grid):
+        transform, shape, grid_dates, grid_values = grid
+        weights = get_cached_hru_pixel_weights(hru_pixel_cache, transform, shape, hru_polygon_path, hru_polygons,
+                                               hru_ids, HRU_POLYGON_ID_FIELD)
+        zonal_means = get_zonal_means(weights, np.column_stack(grid_values), FILL_VALUE)
+        date_hru_values[grid_dates] = zonal_means.T
+        grid_dates.clear()
+        grid_values.clear()
 
-def main():
+    for date_index, date in enumerate(dates):
+        try:
+            with rasterio.open(raster_result_directory + '/' + date + '.tif') as raster:
+                raster_values = read_raster_band(raster).ravel()
+                grid = grids.setdefault((tuple(raster.transform)[:6], raster.shape),
+                                        (raster.transform, raster.shape, [], []))
+        except:
+            continue
 
-    # D_RASTER_RESULT must have been created in a previous step
-    raster_result_directory = 'D_RASTER_RESULT'
+        grid[2].append(date_index)
+        grid[3].append(raster_values)
+        # bounded memory: dates of a grid are processed by batches of ZONAL_BATCH_DATES
+        if len(grid[2]) >= ZONAL_BATCH_DATES:
+            compute_zonal_means(grid)
 
-    # open hru shapefile
-    hru_shape_file = gpd.read_file('E_SWATPLUS_OUTPUT/HRU_SHAPEFILE/hru_points.shp')
+    for grid in grids.values():
+        if grid[2]:
+            compute_zonal_means(grid)
+
+    return date_hru_values
+
+
+def get_raster_value_index(raster_day_ordinals, raster_hru_ids):
 
-    # read table hru_wb_day
-    swat_values_df = read_sqlite_table('E_SWATPLUS_OUTPUT/swatplus_output.sqlite', 'hru_wb_day',
-                                       ['yr', 'mon', 'day', 'unit', 'sw_final', 'sw_ave', 'sw_init', 'et', 'precip'])
-    print(swat_values_df.head())
+    # (dates, units) of rows and columns of raster values (date x HRU), built once for all chunks of hru_wb_day
+    dates = pd.Index(np.asarray(raster_day_ordinals, dtype=np.int64))
+    units = pd.Index(pd.to_numeric(pd.Series(raster_hru_ids, dtype=object)).astype(np.int64))
+    if not dates.is_unique or not units.is_unique:
+        raise ValueError('raster values: duplicate dates or HRU ids')
 
-    swat_values_df['swat_date'] = swat_values_df[['yr', 'mon', 'day']].apply(lambda x: get_date(*x), axis=1)
+    return dates, units
 
-    # keep columns of interest
-    swat_values_df = swat_values_df[['swat_date', 'yr', 'mon', 'unit', 'sw_final', 'sw_ave', 'sw_init', 'et', 'precip']]
 
-    # add subbasin column
+def join_raster_values(swat_values_df, raster_value_index, raster_values):
+    """Return raster value of (day ordinal, unit) of each row of swat_values_df.
+
+    Keyed join on integer keys: raster_values is a (date x HRU) array, each row gets the value at (position of its
+    day ordinal, position of its unit) in raster_value_index (see get_raster_value_index). Raises ValueError if a row
+    has no raster value.
+    """
+    dates, units = raster_value_index
+    date_positions = dates.get_indexer(swat_values_df['day_ordinal'])
+    unit_positions = units.get_indexer(swat_values_df['unit'].astype(np.int64))
+    is_missing = (date_positions < 0) | (unit_positions < 0)
+    if is_missing.any():
+        first_missing = swat_values_df[is_missing].iloc[0]
+        raise ValueError('{0} rows of hru_wb_day without raster value (e.g. date {1}, unit {2})'.format(
+            is_missing.sum(), first_missing['swat_date'], first_missing['unit']))
+
+    return raster_values[date_positions, unit_positions]
+
+
+def main():
+
+    # D_RASTER_RESULT must have been created in a previous step
+    raster_result_directory = 'D_RASTER_RESULT'
+
+    # open hru shapefile
+    hru_shapefile_path = 'E_SWATPLUS_OUTPUT/HRU_SHAPEFILE/hru_points.shp'
+    hru_shape_file = gpd.read_file(hru_shapefile_path)
+    hru_pixel_cache = open_hru_pixel_cache(hru_shapefile_path)
+
+    # dates of table hru_wb_day (date range and units filtered by SQLite)
+    swat_database_filepath = 'E_SWATPLUS_OUTPUT/swatplus_output.sqlite'
+    swat_dates_df = read_sqlite_dates(swat_database_filepath, 'hru_wb_day', SWAT_DATE_FROM, SWAT_DATE_TO, SWAT_UNITS)
+    # 'YYYY-MM-DD' strings: raster filenames of step 03
+    swat_day_ordinals = get_day_ordinals(swat_dates_df['yr'], swat_dates_df['mon'], swat_dates_df['day'])
+    swat_dates = day_ordinals_to_strings(swat_day_ordinals).tolist()
+    print('number of days in SWAT+ output: ' + str(len(swat_dates)))
 
     # F_STATISTICS_INPUT directory is expected to have been created in a previous step
     hru_subbasin_rel_df = read_sqlite_table('F_STATISTICS_INPUT/swatplus_smap_merge.sqlite', 'hru_subbasin_rel',
                                          ['id', 'subbasin'])
-
-    # write query in SQL syntax: here we can use dataframes as normal SQL tables
-    query = '''
-        SELECT 
-            df_left.*,
-            df_right.subbasin
-        FROM swat_values_df AS df_left
-        INNER JOIN hru_subbasin_rel_df AS df_right
-        ON df_left.unit = df_right.id;
-        '''
-
-    # run SQL query on dataframes
-    swat_values_df = sqldf(query, locals())  # use locals here: dataframes are local variables
-    print(swat_values_df.head())
-
-    # group by date
-    dates_df = swat_values_df[['swat_date', 'unit']].groupby('swat_date')
-    print('number of days in SWAT+ output: ' + str(len(dates_df)))
-
-    # read raster point values for all dates
-    date_raster_values = []
-    for entry in dates_df:
-        date = entry[0]
-        date_hru_values = read_point_values_from_raster(date, raster_result_directory, hru_shape_file)
-        date_raster_values.append([date, date_hru_values])
-
-    # reshape raster values into same format as SWAT+ table
-    raster_entries = []
-    for date_entry in date_raster_values:
-        date = date_entry[0]
-        hru_entries = date_entry[1]
-        for hru_entry in hru_entries:
-            hru = hru_entry[0]
-            point_value = hru_entry[1]
-            raster_entries.append([date, hru, point_value])
-
-    raster_values_df = pd.DataFrame(raster_entries, columns=['raster_date', 'raster_unit', 'soil_moisture_1km'])
-
-    print('swat_values_df length:   ' + str(swat_values_df.shape[0]))
-    print('raster_values_df length: ' + str(raster_values_df.shape[0]))
-
-    swat_values_df['raster_date'] = raster_values_df['raster_date']
-    swat_values_df['raster_unit'] = raster_values_df['raster_unit']
-    swat_values_df['soil_moisture_1km'] = raster_values_df['soil_moisture_1km']
-
-    print('soil_moisture_1km <> zero:   ', np.count_nonzero(raster_values_df['soil_moisture_1km']))
-
-    rows_with_zero = (raster_values_df['soil_moisture_1km'] == 0).sum()
-    print('soil_moisture_1km == zero:   ', rows_with_zero)
-
-    rows_with_neg_values = (raster_values_df['soil_moisture_1km'] == -9999.0).sum()
-    print('soil_moisture_1km == -9999.0:', rows_with_neg_values)
+    hru_subbasin_rel_df = hru_subbasin_rel_df.rename(columns={'id': 'unit'})
+
+    # read raster values for all dates: value of pixel at HRU point, or mean of pixels covered by HRU polygon
+    # raster_values: float32 array (date x HRU), dates of swat_dates, HRUs of hru_shape_file
+    raster_hru_ids = hru_shape_file['HRU'].tolist()
+    if HRU_SAMPLING_MODE == 'zonal':
+        hru_polygons = gpd.read_file(HRU_POLYGON_SHAPEFILE)
+        if hru_polygons.crs is not None and hru_polygons.crs.to_epsg() != 4326:
+            hru_polygons = hru_polygons.to_crs(epsg=4326)  # rasters of step 03: EPSG:4326
+        raster_values = read_zonal_values_from_rasters(swat_dates, raster_result_directory, raster_hru_ids,
+                                                       hru_pixel_cache, HRU_POLYGON_SHAPEFILE, hru_polygons)
+    else:
+        raster_values = np.zeros((len(swat_dates), len(raster_hru_ids)), dtype=np.float32)
+        for date_index, date in enumerate(swat_dates):
+            raster_values[date_index] = read_point_values_from_raster(date, raster_result_directory, hru_shape_file,
+                                                                      hru_pixel_cache)
+    print_hru_pixel_cache_stats(hru_pixel_cache)
+    raster_value_index = get_raster_value_index(swat_day_ordinals, raster_hru_ids)
 
     # database filepath OUT
     statistics_input_directory = 'F_STATISTICS_INPUT'
@@ -131,12 +161,80 @@ def main():
 
     # new sqlite database
     database_filepath_out = statistics_input_directory + '/' + 'swatplus_smap_merge.sqlite'
-
     con = sqlite3.connect(database_filepath_out)
-    swat_values_df.to_sql('hru_day_values', con, if_exists="replace")
+    # table of a previous run is dropped first: chunks are appended, no chunk (no row selected) leaves no table
+    con.execute('DROP TABLE IF EXISTS hru_day_values;')
+
+    # table hru_wb_day is read, merged and written by chunks of SWAT_CHUNK_ROWS rows: memory is set by chunk size
+    number_of_rows = 0
+    rows_with_non_zero_values = 0
+    rows_with_zero = 0
+    rows_with_neg_values = 0
+    swat_chunks = read_sqlite_table_chunks(swat_database_filepath, 'hru_wb_day',
+                                           ['yr', 'mon', 'day', 'unit', 'sw_final', 'sw_ave', 'sw_init', 'et',
+                                            'precip'], SWAT_DATE_FROM, SWAT_DATE_TO, SWAT_UNITS, SWAT_CHUNK_ROWS)
+    for chunk_index, swat_values_df in enumerate(swat_chunks):
+        if chunk_index == 0:
+            print(swat_values_df.head())
+
+        # day ordinal (int32) is the join key, swat_date ('YYYY-MM-DD') is only written to table hru_day_values
+        swat_values_df['day_ordinal'] = get_day_ordinals(swat_values_df['yr'], swat_values_df['mon'],
+                                                         swat_values_df['day'])
+        swat_values_df['swat_date'] = day_ordinals_to_strings(swat_values_df['day_ordinal'])
+
+        # keep columns of interest
+        swat_values_df = swat_values_df[['day_ordinal', 'swat_date', 'yr', 'mon', 'unit', 'sw_final', 'sw_ave',
+                                         'sw_init', 'et', 'precip']]
+
+        # add subbasin column: inner join on unit = id (each HRU belongs to one subbasin), rows keep their order
+        swat_values_df = swat_values_df.merge(hru_subbasin_rel_df, on='unit', how='inner', validate='many_to_one')
+
+        # join raster values on (date, unit): raster_date and raster_unit are kept for the columns of table
+        # hru_day_values, they are equal to swat_date and unit
+        swat_values_df['raster_date'] = swat_values_df['swat_date']
+        swat_values_df['raster_unit'] = swat_values_df['unit'].astype(str)
+        swat_values_df['soil_moisture_1km'] = join_raster_values(swat_values_df, raster_value_index, raster_values)
+        swat_values_df = swat_values_df.drop(columns='day_ordinal')
+        if chunk_index == 0:
+            print(swat_values_df.head())
+
+        # index continues over chunks (column 'index' of table hru_day_values)
+        swat_values_df.index = range(number_of_rows, number_of_rows + swat_values_df.shape[0])
+        swat_values_df.to_sql('hru_day_values', con, if_exists='append')
+
+        number_of_rows += swat_values_df.shape[0]
+        rows_with_non_zero_values += np.count_nonzero(swat_values_df['soil_moisture_1km'])
+        rows_with_zero += (swat_values_df['soil_moisture_1km'] == 0).sum()
+        rows_with_neg_values += (swat_values_df['soil_moisture_1km'] == -9999.0).sum()
+
     con.close()
-    print('dataframe saved to: ' + database_filepath_out)
 
+    if number_of_rows == 0:
+        print('no rows of hru_wb_day selected: table hru_day_values not written')
+    print('swat_values_df length:   ' + str(number_of_rows))
+    print('raster values:           ' + str(raster_values.shape[0]) + ' dates')
+
+    print('soil_moisture_1km <> zero:   ', rows_with_non_zero_values)
+    print('soil_moisture_1km == zero:   ', rows_with_zero)
+    print('soil_moisture_1km == -9999.0:', rows_with_neg_values)
+
+    print('dataframe saved to: ' + database_filepath_out)
 
 if __name__ == '__main__':
+
+    # constants
+    # 'point': value of pixel at HRU point (hru_points.shp of step 04)
+    # 'zonal': area-weighted mean of pixels covered by HRU polygons (same HRU order as hru_points.shp)
+    HRU_SAMPLING_MODE = 'point'
+    # HRU polygons, e.g. copy of <QSWAT+ project>/Watershed/Shapes/hrus2.shp; field with HRU id(s), comma separated
+    HRU_POLYGON_SHAPEFILE = 'E_SWATPLUS_OUTPUT/HRU_POLYGONS/hrus2.shp'
+    HRU_POLYGON_ID_FIELD = 'HRUS'
+    # zonal mode: dates per sparse matrix product (memory: number of pixels x ZONAL_BATCH_DATES values)
+    ZONAL_BATCH_DATES = 256
+    # rows of hru_wb_day: date range 'YYYY-MM-DD' ('' for all dates), units ([] for all HRUs), rows per chunk
+    SWAT_DATE_FROM = ''
+    SWAT_DATE_TO = ''
+    SWAT_UNITS = []
+    SWAT_CHUNK_ROWS = 1000000
+
     main()
@@ -9,16 +9,17 @@ Last changed on.. 02.05.2022
 """
 
 from util.sqlite_util import read_sqlite_table
+from util.calendar_util import get_month_ordinals, month_ordinals_to_strings
 import sqlite3
 
 def get_dataframes_with_means(daily_values_df, aggregation_by):
 
-    # add columns before any groupby/mean processing
-    daily_values_df['period'] = daily_values_df[['yr', 'mon']].apply(
-        lambda x: str(int(x[0])) + '-' + str(int(x[1])).zfill(2), axis=1)
+    # add columns before any groupby/mean processing: month ordinal (int32) is the group key
+    daily_values_df['month'] = get_month_ordinals(daily_values_df['yr'], daily_values_df['mon'])
 
     # sw_final mean
-    sw_final_mean_df = daily_values_df.groupby(['period', aggregation_by])['sw_final'].mean().reset_index()
+    sw_final_mean_df = daily_values_df.groupby(['month', aggregation_by])['sw_final'].mean().reset_index()
+    sw_final_mean_df.insert(0, 'period', month_ordinals_to_strings(sw_final_mean_df['month']))
     print(sw_final_mean_df.head(10))
 
     # Pandas dataframe filter with Multiple conditions
@@ -28,7 +29,9 @@ def get_dataframes_with_means(daily_values_df, aggregation_by):
     print(valid_values_df.shape[0])
 
     # after groupby/mean, with reset_index(), we restore the DataFrame format to the previous form
-    soil_moisture_mean_df = valid_values_df.groupby(['period', aggregation_by])['soil_moisture_1km'].mean().reset_index()
+    soil_moisture_mean_df = valid_values_df.groupby(['month', aggregation_by])['soil_moisture_1km'].mean().reset_index()
+    # period ('YYYY-MM') is written for display (e.g. step 08), month is the key of steps 09, 10 and 13
+    soil_moisture_mean_df.insert(0, 'period', month_ordinals_to_strings(soil_moisture_mean_df['month']))
     print(soil_moisture_mean_df.head(10))
 
     return sw_final_mean_df, soil_moisture_mean_df
@@ -38,7 +41,7 @@ def main():
 
     # F_STATISTICS_INPUT directory is expected to have been created in a previous step
     merged_values_df = read_sqlite_table('F_STATISTICS_INPUT/swatplus_smap_merge.sqlite', 'hru_day_values',
-                                         ['swat_date', 'yr', 'mon', 'unit', 'sw_final', 'sw_ave', 'sw_init', 'soil_moisture_1km', 'subbasin'])
+                                         ['yr', 'mon', 'unit', 'sw_final', 'sw_ave', 'sw_init', 'soil_moisture_1km', 'subbasin'])
 
     statistics_input_directory = 'F_STATISTICS_INPUT'
     database_filepath_out = statistics_input_directory + '/' + 'swatplus_smap_merge.sqlite'
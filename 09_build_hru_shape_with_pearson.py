@@ -23,6 +23,10 @@ def determine_pearson_correlation(series1_df, series2_df, soil_dict, unit_index)
     series2_filter = series2_df['unit'] == unit_index
     series2_df = series2_df[series2_filter]
 
+    # align time series on month ordinal: months without valid SMAP value are missing in series2_df
+    series1_df = series1_df[series1_df['month'].isin(series2_df['month'])]
+    series2_df = series2_df[series2_df['month'].isin(series1_df['month'])]
+
     # How to deal with SettingWithCopyWarning in Pandas
     # https://stackoverflow.com/questions/20625582/how-to-deal-with-settingwithcopywarning-in-pandas
     series1_copy_df = series1_df.copy()  # series1_df is passed by reference: prevent warning at mult. by scalar
@@ -45,11 +49,11 @@ def main():
 
     # F_STATISTICS_INPUT directory is expected to have been created in a previous step
     sw_final_mean_df = read_sqlite_table('F_STATISTICS_INPUT/swatplus_smap_merge.sqlite', 'hru_sw_final_mon',
-                                       ['period', 'unit', 'sw_final'])
+                                       ['month', 'unit', 'sw_final'])
 
     soil_moisture_mean_df = read_sqlite_table('F_STATISTICS_INPUT/swatplus_smap_merge.sqlite',
                                               'hru_soil_moisture_mon',
-                                              ['period', 'unit', 'soil_moisture_1km'])
+                                              ['month', 'unit', 'soil_moisture_1km'])
 
     # ---------------------------------------------------------------------------------------------------------------- #
     # # test: remove SWAT+ rows for which there is no corresponding entry in SMAP
@@ -12,26 +12,32 @@ import os
 import glob
 import fiona
 import rasterio
+import numpy as np
 from rasterio.mask import mask
+from util.raster_util import decode_raster_data, get_raster_scales, write_raster
+from util.build_manifest_util import open_build_manifest, get_file_fingerprint, get_fingerprint, is_up_to_date, \
+    record_build
+from util.granule_store_util import get_file_sha256
 
+MASK_SHAPEFILE = 'A_BOUNDING_BOX_INPUT/_converted_to_wgs84.shp'
+
+
+def get_mask_filepath(filepath_in):
+    return 'G_RASTER_MASKS/' + filepath_in.split('\\')[1]
 
-def extract(filepath_in):
-    with fiona.open("A_BOUNDING_BOX_INPUT/_converted_to_wgs84.shp", "r") as shapefile:
-        geoms = [feature["geometry"] for feature in shapefile]
 
+def extract(filepath_in, geoms):
     with rasterio.open(filepath_in) as src:
         out_image, out_transform = mask(src, geoms, crop=True)
-        out_meta = src.meta.copy()
+        # masked raster is written in the same format as input raster (scaled int16 or float32)
+        out_image = np.stack([decode_raster_data(band_image, src.nodata, scale, offset)
+                              for band_image, scale, offset in zip(out_image, src.scales, src.offsets)])
+        crs = src.crs
+        scales = get_raster_scales(src)
 
-    out_meta.update({"driver": "GTiff",
-                     "height": out_image.shape[1],
-                     "width": out_image.shape[2],
-                     "transform": out_transform})
-
-    filepath_out = 'G_RASTER_MASKS/' + filepath_in.split('\\')[1]
-    with rasterio.open(filepath_out, "w", **out_meta) as dest:
-        dest.write(out_image)
-        print('Masked raster saved:', filepath_out)
+    filepath_out = get_mask_filepath(filepath_in)
+    write_raster(filepath_out, out_image, out_transform, crs, scales)
+    print('Masked raster saved:', filepath_out)
 
 
 def main():
@@ -40,8 +46,27 @@ def main():
     query = os.path.join('D_RASTER_RESULT', search_criteria)
     file_paths_in = glob.glob(query)
 
+    with fiona.open(MASK_SHAPEFILE, "r") as shapefile:
+        geoms = [feature["geometry"] for feature in shapefile]
+
+    # build manifest: rasters already masked with the same mask geometry (.shp file content) are not masked again
+    build_manifest = open_build_manifest('G_RASTER_MASKS')
+    mask_hash = get_file_sha256(MASK_SHAPEFILE)
+    up_to_date_files = 0
+
     for file in file_paths_in:
-        extract(file)
+        filepath_out = get_mask_filepath(file)
+        build_inputs = {'raster': get_file_fingerprint(file), 'mask': mask_hash}
+        fingerprint = get_fingerprint(build_inputs)
+        if is_up_to_date(build_manifest, filepath_out, fingerprint):
+            up_to_date_files += 1
+            continue
+
+        extract(file, geoms)
+        record_build(build_manifest, filepath_out, fingerprint, build_inputs)
+
+    build_manifest.close()
+    print('masked rasters up to date (not masked again): ', up_to_date_files)
 
 
 if __name__ == '__main__':
@@ -14,18 +14,20 @@ import os
 import glob
 import rasterio
 import numpy as np
+from util.raster_util import read_raster_band, get_raster_scales, write_raster
+from util.build_manifest_util import open_build_manifest, get_file_fingerprint, get_fingerprint, is_up_to_date, \
+    record_build
 
 
 def get_raster_shape(file):
+    # shape from raster header: no need to read (decompress) the raster
     with rasterio.open(file) as src:
-        data = src.read(1)
-        return np.array(data).shape
+        return src.shape
 
 
 def is_outlier(file, height, width, threshold):
     with rasterio.open(file) as src:
-        data = src.read(1)
-        shape = np.array(data).shape
+        shape = src.shape
         if shape[0] < height * threshold or shape[1] < width * threshold:
             return True
         else:
@@ -34,10 +36,10 @@ def is_outlier(file, height, width, threshold):
 
 def get_raster_cleaned(file, median_shape):
     with rasterio.open(file) as src:
-        data = src.read(1)
-        shape = np.array(data).shape
+        shape = src.shape
         if shape[0] >= median_shape[0] and shape[1] >= median_shape[1]:
-            raster = src.read(1)[0:median_shape[0], 0:median_shape[1]]
+            # only the window of median shape is read, values are rescaled (scaled int16 rasters of step 03)
+            raster = read_raster_band(src, window=((0, median_shape[0]), (0, median_shape[1])))
             raster[raster == -9999.0] = np.nan
             raster[raster == 0] = np.nan
             return raster
@@ -45,13 +47,10 @@ def get_raster_cleaned(file, median_shape):
             return None
 
 
-def save_averaged_raster(filepath_out, raster, meta):
+def save_averaged_raster(filepath_out, raster, meta, scales):
 
-    meta.update(dtype=rasterio.float32)
-
-    # write output file
-    with rasterio.open(filepath_out, 'w', **meta) as dst:
-        dst.write(raster.astype(rasterio.float32), 1)
+    # write output file (same format as input rasters, NaN -> no data)
+    write_raster(filepath_out, raster, meta['transform'], meta['crs'], scales)
 
 def main():
 
@@ -125,59 +124,49 @@ def main():
     print('smallest shape on mean: ', threshold, smallest_shape_on_mean)
     print('smallest shape on median: ', threshold, smallest_shape_on_median)  # <-- this one, with threshold 0.98
 
-    # 3) read all data as a list of numpy arrays
+    # 3) read all data as a list of numpy arrays, by month
 
     # get metadata from one of the input files
     with rasterio.open(file_paths_in[0]) as src:
         meta = src.meta
+        scales = get_raster_scales(src)
 
-    raster_list_by_month = []
-
-    previous_year = None
-    previous_month = None
-
+    files_by_month = {}
     for file in file_paths_in:
         # G_RASTER_MASKS\2020-11-26.tif
         year = file.split('\\')[1].split('-')[0]
         month = file.split('\\')[1].split('-')[1]
-        if previous_year is None and previous_month is None:  # first entry in loop
-            previous_year = year
-            previous_month = month
+        files_by_month.setdefault((year, month), []).append(file)
+
+    # build manifest: months whose mean was built from the same masked rasters (and crop shape) are not rebuilt
+    build_manifest = open_build_manifest('H_RASTER_MEANS')
+    up_to_date_months = 0
+
+    for (year, month), month_files in files_by_month.items():
+        filepath_out = 'H_RASTER_MEANS/' + year + '-' + month + '.tif'
+        build_inputs = {'rasters': [get_file_fingerprint(file) for file in sorted(month_files)],
+                        'shape': smallest_shape_on_median}
+        fingerprint = get_fingerprint(build_inputs)
+        if is_up_to_date(build_manifest, filepath_out, fingerprint):
+            up_to_date_months += 1
+            continue
+
+        raster_list_by_month = []
+        for file in month_files:
             raster = get_raster_cleaned(file, smallest_shape_on_median)
             if raster is not None:  # not interested in outliers
                 raster_list_by_month.append(raster)
-        else:
-            if month != previous_month:
-                # processing for previous month
-                # perform average on previous month
-                averaged_raster = np.nanmean(raster_list_by_month, axis=0)
-                # save averaged raster
-                filepath_out = 'H_RASTER_MEANS/' + previous_year + '-' + previous_month + '.tif'
-                save_averaged_raster(filepath_out, averaged_raster, meta)
-                # reset raster list
-                raster_list_by_month = []
-
-                # processing for new month
-                previous_month = month
-                # has the year changed?
-                if year != previous_year:
-                    previous_year = year
-                # fill a new raster list for current month
-                raster = get_raster_cleaned(file, smallest_shape_on_median)
-                if raster is not None:  # not interested in outliers
-                    raster_list_by_month.append(raster)
-            else:
-                # add raster to current month
-                raster = get_raster_cleaned(file, smallest_shape_on_median)
-                if raster is not None:  # not interested in outliers
-                    raster_list_by_month.append(raster)
-
-    # last month has no follower => explicit processing
-    # perform average on previous month
-    averaged_raster = np.nanmean(raster_list_by_month, axis=0)
-    # and save last year/month entry
-    filepath_out = 'H_RASTER_MEANS/' + previous_year + '-' + previous_month + '.tif'
-    save_averaged_raster(filepath_out, averaged_raster, meta)
+
+        if not raster_list_by_month:  # only outliers in this month
+            continue
+
+        # perform average on month and save averaged raster
+        averaged_raster = np.nanmean(raster_list_by_month, axis=0)
+        save_averaged_raster(filepath_out, averaged_raster, meta, scales)
+        record_build(build_manifest, filepath_out, fingerprint, build_inputs)
+
+    build_manifest.close()
+    print('months up to date (not rebuilt): ', up_to_date_months)
 
 
 if __name__ == '__main__':
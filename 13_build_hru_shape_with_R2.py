@@ -10,6 +10,7 @@ Last changed on.. 20.07.2022
 
 from util.sqlite_util import read_sqlite_table, count_sqlite_table_rows
 from util.soil_util import get_hru_soil_dict, get_soil_correction
+from util.calendar_util import month_ordinals_to_strings
 import numpy as np
 import fiona
 import matplotlib
@@ -41,6 +42,10 @@ def determine_r2(series1_df, series2_df, soil_dict, unit_index):
     series2_filter = series2_df['unit'] == unit_index
     series2_df = series2_df[series2_filter]
 
+    # align time series on month ordinal: months without valid SMAP value are missing in series2_df
+    series1_df = series1_df[series1_df['month'].isin(series2_df['month'])]
+    series2_df = series2_df[series2_df['month'].isin(series1_df['month'])]
+
     # How to deal with SettingWithCopyWarning in Pandas
     # https://stackoverflow.com/questions/20625582/how-to-deal-with-settingwithcopywarning-in-pandas
     series1_copy_df = series1_df.copy()  # series1_df is passed by reference: prevent warning at mult. by scalar
@@ -52,10 +57,10 @@ def determine_r2(series1_df, series2_df, soil_dict, unit_index):
     # plot time series for selected HRUs
     if unit_index > 1500 and unit_index < 1511:
         ax1 = plt.subplot()
-        l1, = ax1.plot(series1_copy_df['period'], series1_copy_df['sw_final'],
+        l1, = ax1.plot(month_ordinals_to_strings(series1_copy_df['month']), series1_copy_df['sw_final'],
                        linewidth=3, color='red')
         ax2 = ax1.twinx()
-        l2, = ax2.plot(series2_df['period'], series2_df['soil_moisture_1km'],
+        l2, = ax2.plot(month_ordinals_to_strings(series2_df['month']), series2_df['soil_moisture_1km'],
                        linewidth=3, color='blue')
         plt.legend([l1, l2], ["sw_final", "soil_moisture_1km"])
 
@@ -77,7 +82,7 @@ def main():
 
     # F_STATISTICS_INPUT directory is expected to have been created in a previous step
     sw_final_mean_df = read_sqlite_table('F_STATISTICS_INPUT/swatplus_smap_merge.sqlite', 'hru_sw_final_mon',
-                                         ['period', 'unit', 'sw_final'])
+                                         ['month', 'unit', 'sw_final'])
 
     hru_sw_final_mon_count = count_sqlite_table_rows('F_STATISTICS_INPUT/swatplus_smap_merge.sqlite',
                                                      'hru_sw_final_mon')
@@ -85,7 +90,7 @@ def main():
 
     soil_moisture_mean_df = read_sqlite_table('F_STATISTICS_INPUT/swatplus_smap_merge.sqlite',
                                               'hru_soil_moisture_mon',
-                                              ['period', 'unit', 'soil_moisture_1km'])
+                                              ['month', 'unit', 'soil_moisture_1km'])
     hru_soil_moisture_mon_count = count_sqlite_table_rows('F_STATISTICS_INPUT/swatplus_smap_merge.sqlite',
                                                           'hru_soil_moisture_mon')
     print(f'{hru_soil_moisture_mon_count} in hru_soil_moisture_mon / SMAP')
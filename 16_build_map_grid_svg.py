@@ -15,6 +15,7 @@ import matplotlib as mpl
 import rasterio
 import numpy as np
 import svgutils.transform as sg
+from util.raster_util import read_raster_band
 
 
 def create_legend_svg(svg_file_directory, target_file):
@@ -55,8 +56,8 @@ def create_grid_svg(raster_directory, svg_file_directory, target_file):
         try:
             fig_title = os.path.basename(raster_list[i])[:-4]
             raster = rasterio.open(raster_list[i])
-            raster_data = raster.read()
-            image = np.reshape(raster_data, (raster_data.shape[0] * raster_data.shape[1], raster_data.shape[2]))
+            # rescaled values (scaled int16 rasters), no data -> NaN (blank)
+            image = read_raster_band(raster, fill_value=np.nan)
             axi.imshow(image, norm=norm)
             axi.set_title(fig_title, size=8)
             # https://stackoverflow.com/questions/25862026/turn-off-axes-in-subplots
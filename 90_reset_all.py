@@ -8,7 +8,9 @@ Version.......... 1.00
 Last changed on.. 02.05.2022
 """
 
+import os
 from util.file_util import delete_complete_directory
+from util.granule_store_util import open_granule_store, release_granules
 
 
 def main():
@@ -17,8 +19,20 @@ def main():
     delete_complete_directory('D_RASTER_RESULT')
     delete_complete_directory('E_SWATPLUS_OUTPUT/HRU_SHAPEFILE')  # keep SWAT+ sqlite file
 
+    # granules of this project can be evicted from the granule store (see 02_download_h5.py), unless another project
+    # references them
+    if RELEASE_GRANULES:
+        granule_store = open_granule_store(GRANULE_STORE_DIRECTORY)
+        release_granules(granule_store, os.path.basename(os.path.abspath('.')))
+        granule_store.close()
+
 
 if __name__ == '__main__':
+
+    # constants
+    RELEASE_GRANULES = False
+    GRANULE_STORE_DIRECTORY = os.path.join(os.path.expanduser('~'), 'SMAP_GRANULE_STORE')
+
     main()
 
 
@@ -0,0 +1,109 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... benchmark of bounding box coverage search (set cover vs power set)
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import random
+import time
+from itertools import combinations
+from shapely.geometry import box
+from shapely.ops import unary_union
+from util.coverage_util import find_covering_combination
+
+
+def find_covering_combination_by_power_set(bb_polygon, polygons):
+
+    # previous implementation of 01_search_and_filter_h5.py: all 2^n combinations, ordered by size
+    elements = list(range(len(polygons)))
+    polygon_combinations = sum([list(map(list, combinations(elements, i))) for i in range(len(elements) + 1)], [])
+    polygon_combinations.pop(0)
+
+    for combination in polygon_combinations:
+        polygon_union = unary_union([polygons[i] for i in combination])
+        if bb_polygon.within(polygon_union):
+            return combination
+
+    return []
+
+
+def get_random_footprints(bb_polygon, number_of_footprints, rng):
+
+    # SPL2SMAP_S footprints are ~3° x 2° boxes; shift them randomly around the bounding box
+    min_x, min_y, max_x, max_y = bb_polygon.bounds
+    footprints = []
+    for _ in range(number_of_footprints):
+        x = rng.uniform(min_x - 3.0, max_x)
+        y = rng.uniform(min_y - 2.0, max_y)
+        footprints.append(box(x, y, x + rng.uniform(0.3, 3.2), y + rng.uniform(0.3, 2.0)))
+
+    return footprints
+
+
+def get_edge_case_footprints():
+
+    # (bounding box, footprints) of cases the search must solve exactly like the power set
+    # sliver: C adds less than COVERAGE_AREA_TOLERANCE of area, but closes the gap left by B
+    return [(box(0, 0, 1, 1), [box(-1, -1, 0.5, 2), box(0.5, -1, 1 - 1e-10, 2), box(1 - 2e-10, -1, 3, 2)])]
+
+
+def measure(function, *args):
+    start_time = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start_time
+
+
+def main():
+
+    global MAX_FOOTPRINTS, MAX_FOOTPRINTS_POWER_SET, DAYS_PER_SIZE
+
+    bb_polygon = box(9.075181780910482, 35.789381002622484, 9.648289096658775, 36.539747306557665)
+    rng = random.Random(42)
+
+    for edge_case_bb_polygon, footprints in get_edge_case_footprints():
+        result = find_covering_combination(edge_case_bb_polygon, footprints)
+        reference = find_covering_combination_by_power_set(edge_case_bb_polygon, footprints)
+        print('edge case:', result, 'ok' if result == reference else 'result mismatch: ' + str(reference))
+
+    print('{0:>3} {1:>14} {2:>14} {3:>9}'.format('n', 'set cover (ms)', 'power set (ms)', 'covered'))
+
+    for number_of_footprints in range(2, MAX_FOOTPRINTS + 1):
+
+        set_cover_time = 0.0
+        power_set_time = 0.0
+        covered_days = 0
+
+        for _ in range(DAYS_PER_SIZE):
+            footprints = get_random_footprints(bb_polygon, number_of_footprints, rng)
+
+            result, duration = measure(find_covering_combination, bb_polygon, footprints)
+            set_cover_time += duration
+            if result:
+                covered_days += 1
+
+            if number_of_footprints <= MAX_FOOTPRINTS_POWER_SET:
+                reference, duration = measure(find_covering_combination_by_power_set, bb_polygon, footprints)
+                power_set_time += duration
+                if result != reference:
+                    print('result mismatch:', result, reference)
+
+        power_set_column = '{0:14.2f}'.format(power_set_time / DAYS_PER_SIZE * 1000) \
+            if number_of_footprints <= MAX_FOOTPRINTS_POWER_SET else '{0:>14}'.format('-')
+
+        print('{0:>3} {1:14.2f} {2} {3:>6}/{4}'.format(number_of_footprints, set_cover_time / DAYS_PER_SIZE * 1000,
+                                                        power_set_column, covered_days, DAYS_PER_SIZE))
+
+
+if __name__ == '__main__':
+
+    # footprints per day: n = 2..MAX_FOOTPRINTS
+    MAX_FOOTPRINTS = 20
+    # power set reference is exponential: only run it for small n
+    MAX_FOOTPRINTS_POWER_SET = 12
+    DAYS_PER_SIZE = 20
+
+    main()
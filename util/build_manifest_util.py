@@ -0,0 +1,82 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... build manifest util functions (incremental rebuild of rasters from input fingerprints)
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# one manifest per output directory: deleting the directory (90_reset_all.py) also resets its manifest
+BUILD_MANIFEST_FILENAME = 'build_manifest.sqlite'
+
+
+def open_build_manifest(output_directory):
+
+    conn = sqlite3.connect(os.path.join(output_directory, BUILD_MANIFEST_FILENAME))
+
+    # output filename -> fingerprint (SHA-256) of inputs + inputs (JSON) of last build
+    # is_empty: inputs did not produce any output file (e.g. no pixel within area of interest)
+    conn.execute('''CREATE TABLE IF NOT EXISTS build (
+        output TEXT PRIMARY KEY,
+        fingerprint TEXT,
+        inputs TEXT,
+        built_on REAL,
+        is_empty INTEGER DEFAULT 0);''')
+
+    # manifests of previous versions: add column
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(build);')]
+    if 'is_empty' not in columns:
+        conn.execute('ALTER TABLE build ADD COLUMN is_empty INTEGER DEFAULT 0;')
+    conn.commit()
+
+    return conn
+
+
+def get_file_fingerprint(filepath):
+
+    # [filename, size, modification time]: a replaced or rewritten input file gets another fingerprint
+    if not os.path.exists(filepath):
+        return [os.path.basename(filepath), None, None]
+    file_stat = os.stat(filepath)
+
+    return [os.path.basename(filepath), file_stat.st_size, file_stat.st_mtime_ns]
+
+
+def get_fingerprint(inputs):
+
+    # inputs: JSON serializable description of everything the output depends on (files, parameters)
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def is_up_to_date(conn, output_filepath, fingerprint):
+    """Return True if output was built from inputs with the same fingerprint (and output file exists, unless empty)."""
+    row = conn.execute('SELECT fingerprint, is_empty FROM build WHERE output = ?;',
+                       (os.path.basename(output_filepath),)).fetchone()
+
+    return row is not None and row[0] == fingerprint and (bool(row[1]) or os.path.exists(output_filepath))
+
+
+def is_built_empty(conn, output_filepath, fingerprint):
+
+    # inputs with the same fingerprint did not produce any output file
+    row = conn.execute('SELECT is_empty FROM build WHERE output = ? AND fingerprint = ?;',
+                       (os.path.basename(output_filepath), fingerprint)).fetchone()
+
+    return row is not None and bool(row[0])
+
+
+def record_build(conn, output_filepath, fingerprint, inputs, is_empty=False):
+
+    conn.execute('INSERT OR REPLACE INTO build (output, fingerprint, inputs, built_on, is_empty) '
+                 'VALUES (?, ?, ?, ?, ?);',
+                 (os.path.basename(output_filepath), fingerprint, json.dumps(inputs, sort_keys=True, default=str),
+                  time.time(), int(is_empty)))
+    conn.commit()
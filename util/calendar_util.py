@@ -0,0 +1,58 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... calendar util functions (days and months as int32 ordinals, computed from yr/mon/day columns)
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import numpy as np
+
+# day ordinal: days since 1970-01-01, month ordinal: months since 1970-01 (same values as numpy datetime64[D] and
+# datetime64[M]): ordinals are join and group keys, 'YYYY-MM-DD' / 'YYYY-MM' strings are only built for display
+# and export
+# https://numpy.org/doc/stable/reference/arrays.datetime.html
+ORDINAL_DTYPE = np.int32
+
+
+def get_month_ordinals(years, months):
+
+    # years, months: arrays or dataframe columns (e.g. yr, mon of SWAT+ output)
+    return ((np.asarray(years, dtype=np.int64) - 1970) * 12 + np.asarray(months, dtype=np.int64) - 1)\
+        .astype(ORDINAL_DTYPE)
+
+
+def get_day_ordinals(years, months, days):
+
+    # first day of month (datetime64[M] -> datetime64[D]) + day of month
+    first_days = get_month_ordinals(years, months).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    return (first_days + np.asarray(days, dtype=np.int64) - 1).astype(ORDINAL_DTYPE)
+
+
+def ordinals_to_strings(ordinals, unit):
+
+    # each distinct ordinal is formatted once (a column of daily values holds few distinct dates)
+    unique_ordinals, inverse = np.unique(np.asarray(ordinals, dtype=np.int64), return_inverse=True)
+    unique_strings = np.datetime_as_string(unique_ordinals.astype('datetime64[' + unit + ']'), unit=unit)
+
+    return unique_strings.astype(object)[inverse.ravel()]
+
+
+def day_ordinals_to_strings(day_ordinals):
+
+    # 'YYYY-MM-DD'
+    return ordinals_to_strings(day_ordinals, 'D')
+
+
+def month_ordinals_to_strings(month_ordinals):
+
+    # 'YYYY-MM'
+    return ordinals_to_strings(month_ordinals, 'M')
+
+
+def date_strings_to_day_ordinals(dates):
+
+    # 'YYYY-MM-DD' -> day ordinals (e.g. dates of raster filenames)
+    return np.array(dates, dtype='datetime64[D]').astype(np.int64).astype(ORDINAL_DTYPE)
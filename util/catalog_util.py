@@ -0,0 +1,113 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... granule catalog util functions (SQLite + R-tree index on footprint bounds)
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import sqlite3
+import pandas as pd
+
+
+def open_granule_catalog(database_filepath):
+
+    conn = sqlite3.connect(database_filepath)
+    cursor = conn.cursor()
+
+    # granule metadata, as found by CMR search
+    cursor.execute('''CREATE TABLE IF NOT EXISTS granule (
+        id INTEGER PRIMARY KEY,
+        producer_granule_id TEXT UNIQUE,
+        time_start TEXT,
+        date TEXT,
+        polygon TEXT,
+        url TEXT,
+        version TEXT,
+        revision_date TEXT);''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS granule_date ON granule (date);')
+
+    # R-tree index on footprint bounds (same id as table granule)
+    cursor.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS granule_rtree USING rtree (
+        id, min_lon, max_lon, min_lat, max_lat);''')
+
+    # bounding box coverage: for each bounding box, granules found by search + granules required for coverage
+    cursor.execute('''CREATE TABLE IF NOT EXISTS coverage (
+        bounding_box TEXT,
+        granule_id INTEGER,
+        is_required INTEGER,
+        PRIMARY KEY (bounding_box, granule_id));''')
+
+    conn.commit()
+
+    return conn
+
+
+def get_polygon_bounds(coordinate_string):
+
+    # NSIDC polygon coordinates: lat lon lat lon ...
+    n_coords = [float(value) for value in coordinate_string.split()]
+    lats = n_coords[0::2]
+    lons = n_coords[1::2]
+
+    return min(lons), max(lons), min(lats), max(lats)
+
+
+def save_date_coverage(conn, bounding_box, date, polygon_infos, including_combination, version):
+
+    # polygon infos: [time_start, polygon, link, producer_granule_id, revision_date] (see filter_polygons)
+    cursor = conn.cursor()
+
+    # replace previous coverage info of this date (search result may have changed)
+    cursor.execute('DELETE FROM coverage WHERE bounding_box = ? AND granule_id IN '
+                   '(SELECT id FROM granule WHERE date = ?);', (bounding_box, date))
+
+    for index, polygon_info in enumerate(polygon_infos):
+        time_start, polygon, link, producer_granule_id, revision_date = polygon_info
+
+        # upsert granule: a new revision replaces polygon, url and revision date, granule id stays the same
+        cursor.execute('''INSERT INTO granule (producer_granule_id, time_start, date, polygon, url, version,
+            revision_date) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (producer_granule_id) DO UPDATE SET time_start = excluded.time_start, date = excluded.date,
+            polygon = excluded.polygon, url = excluded.url, version = excluded.version,
+            revision_date = excluded.revision_date;''',
+                       (producer_granule_id, time_start, date, polygon, link['href'], version, revision_date))
+        granule_id = cursor.execute('SELECT id FROM granule WHERE producer_granule_id = ?;',
+                                    (producer_granule_id,)).fetchone()[0]
+
+        min_lon, max_lon, min_lat, max_lat = get_polygon_bounds(polygon)
+        cursor.execute('INSERT OR REPLACE INTO granule_rtree (id, min_lon, max_lon, min_lat, max_lat) '
+                       'VALUES (?, ?, ?, ?, ?);', (granule_id, min_lon, max_lon, min_lat, max_lat))
+
+        cursor.execute('INSERT OR REPLACE INTO coverage (bounding_box, granule_id, is_required) VALUES (?, ?, ?);',
+                       (bounding_box, granule_id, int(index in including_combination)))
+
+    # one transaction per date: catalog is updated incrementally during search
+    conn.commit()
+
+
+def get_granules_covering(conn, bounding_box, date_from, date_to):
+    """Return granules intersecting bounding box (R-tree query on footprint bounds) between two dates (inclusive).
+
+    Result is sorted as CMR search results: by start date, then by producer granule id.
+    Column is_required is 1 for granules required to cover the bounding box, 0 for other granules found by search
+    and missing for granules that were only found by searches for other bounding boxes.
+    """
+    min_lon, min_lat, max_lon, max_lat = [float(value) for value in bounding_box.split(',')]
+
+    sql = '''SELECT granule.id, granule.producer_granule_id, granule.time_start, granule.date, granule.polygon,
+        granule.url, granule.version, granule.revision_date, coverage.is_required
+    FROM granule_rtree
+    INNER JOIN granule
+    ON granule.id = granule_rtree.id
+    LEFT JOIN coverage
+    ON coverage.granule_id = granule.id AND coverage.bounding_box = ?
+    WHERE granule_rtree.max_lon >= ? AND granule_rtree.min_lon <= ?
+    AND granule_rtree.max_lat >= ? AND granule_rtree.min_lat <= ?
+    AND granule.date BETWEEN ? AND ?
+    ORDER BY granule.time_start, granule.producer_granule_id;'''
+
+    return pd.read_sql_query(sql, conn, params=(bounding_box, min_lon, max_lon, min_lat, max_lat, date_from, date_to))
+
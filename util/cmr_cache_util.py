@@ -0,0 +1,108 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... CMR response cache util functions
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import hashlib
+import json
+import os
+import time
+
+
+# cache entries are content-addressed: file name is the SHA-256 of query url + page number (+ snapshot)
+# every entry holds the raw JSON page, as received from CMR, plus the number of hits of the query
+# snapshot: time at which the first page of a scroll was received from CMR; pages 1..n are keyed by the snapshot of
+# their first page, so that all pages of a query expire together and never mix two CMR scrolls
+def get_cmr_cache_key(cmr_query_url, page_number, snapshot=None):
+    if page_number == 0:
+        return hashlib.sha256('{0}|{1}'.format(cmr_query_url, page_number).encode('utf-8')).hexdigest()
+    return hashlib.sha256('{0}|{1}|{2!r}'.format(cmr_query_url, page_number, snapshot).encode('utf-8')).hexdigest()
+
+
+def get_cmr_cache_filepath(cache_directory, cache_key):
+    return cache_directory + '/' + cache_key + '.json'
+
+
+def read_cached_cmr_page(cache_directory, cmr_query_url, page_number, snapshot=None, ttl_seconds=None):
+    """Return (hits, raw page, snapshot) from cache, or None if not cached or expired.
+
+    First page (page_number 0) is returned if its snapshot is not older than ttl_seconds (None: no expiry). Other
+    pages are only returned for the snapshot of the first page they were received with.
+    """
+    filepath = get_cmr_cache_filepath(cache_directory, get_cmr_cache_key(cmr_query_url, page_number, snapshot))
+
+    if not os.path.exists(filepath):
+        return None
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        entry = json.load(f)
+
+    # entries of older versions have no snapshot: read again from CMR
+    if entry.get('snapshot') is None:
+        return None
+    if ttl_seconds is not None and time.time() - entry['snapshot'] > ttl_seconds:
+        return None
+
+    return entry['hits'], entry['page'], entry['snapshot']
+
+
+def write_cached_cmr_page(cache_directory, cmr_query_url, page_number, hits, raw_page, snapshot):
+
+    if not os.path.exists(cache_directory):
+        os.makedirs(cache_directory)
+
+    filepath = get_cmr_cache_filepath(cache_directory, get_cmr_cache_key(cmr_query_url, page_number, snapshot))
+    entry = {'url': cmr_query_url, 'page_number': page_number, 'hits': hits, 'cached_on': time.time(),
+             'snapshot': snapshot, 'page': raw_page}
+
+    # write to temporary file first: an interrupted run never leaves a truncated cache entry
+    temp_filepath = filepath + '.tmp'
+    with open(temp_filepath, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+    os.replace(temp_filepath, filepath)
+
+
+def get_cmr_page_digest(search_page):
+
+    # SHA-256 of the entries of a page (feed metadata, e.g. response time, is not compared)
+    entries = search_page['feed'].get('entry', []) if 'feed' in search_page else []
+    return hashlib.sha256(json.dumps(entries, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def evict_cmr_cache(cache_directory, ttl_seconds, max_size_bytes):
+
+    if not os.path.exists(cache_directory):
+        return
+
+    now = time.time()
+    entries = []
+    for filename in os.listdir(cache_directory):
+        filepath = os.path.join(cache_directory, filename)
+        file_stat = os.stat(filepath)
+        entries.append([file_stat.st_mtime, file_stat.st_size, filepath])
+
+    # 1) expired entries
+    evicted_entries = [entry for entry in entries if now - entry[0] > ttl_seconds]
+
+    # 2) oldest entries, until cache size is below limit
+    remaining_entries = sorted(entry for entry in entries if now - entry[0] <= ttl_seconds)
+    cache_size = sum(entry[1] for entry in remaining_entries)
+    while remaining_entries and cache_size > max_size_bytes:
+        entry = remaining_entries.pop(0)
+        cache_size -= entry[1]
+        evicted_entries.append(entry)
+
+    for entry in evicted_entries:
+        try:
+            os.remove(entry[2])
+        except OSError:
+            pass  # already removed by another run
+
+    if evicted_entries:
+        print('CMR cache: {0} entries evicted, {1:.1f} MB in cache'.format(len(evicted_entries),
+                                                                          cache_size / 1024 / 1024))
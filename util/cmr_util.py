@@ -10,17 +10,31 @@ Last changed on.. 02.05.2022
 
 import base64
 import netrc
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from getpass import getpass
 
 try:
     from urllib.parse import urlparse
     from urllib.request import urlopen, Request, build_opener, HTTPCookieProcessor
     from urllib.error import HTTPError, URLError
+    from http.cookiejar import CookieJar
+    from http.client import HTTPException, IncompleteRead
 except ImportError:
     from urlparse import urlparse
     from urllib2 import urlopen, Request, HTTPError, URLError, build_opener, HTTPCookieProcessor
+    from cookielib import CookieJar
+    from httplib import HTTPException, IncompleteRead
+
+from util.h5_util import is_complete_h5_file, RangeFile, copy_h5_objects
+import h5py
 
 URS_URL = 'https://urs.earthdata.nasa.gov'
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# partial h5 download: remote file is read in blocks of H5_RANGE_BLOCK_SIZE bytes
+H5_RANGE_BLOCK_SIZE = 16 * 1024
 
 def get_username():
     username = ''
@@ -86,40 +100,240 @@ def get_credentials(url):
     return credentials
 
 
-def cmr_download(urls, directory):
-    """Download files from list of urls."""
+def build_download_opener():
+    # one cookie jar for all downloads: after the first URS redirect chain, the session cookie is sent with every
+    # request and later granules are served without going through URS again (CookieJar is thread-safe)
+    return build_opener(HTTPCookieProcessor(CookieJar()))
+
+
+def get_expected_size(response):
+    # 206: 'Content-Range: bytes 1000-3778990/3778991' gives total size; 200: whole file is sent
+    if response.status == 206:
+        content_range = response.headers.get('Content-Range', '')
+        total_size = content_range.split('/')[-1]
+        return int(total_size) if total_size.isdigit() else None
+
+    content_length = response.headers.get('Content-Length')
+    return int(content_length) if content_length is not None else None
+
+
+def verify_download(filepath, expected_size):
+
+    file_size = os.path.getsize(filepath)
+    if expected_size is not None and file_size < expected_size:
+        # connection closed before end of file: .part file is kept, to be resumed
+        raise IncompleteRead(b'', expected_size - file_size)
+    if expected_size is not None and file_size > expected_size:
+        raise ValueError('size is {0} bytes, expected {1} bytes'.format(file_size, expected_size))
+
+    # H5 files hold their own size in the superblock: checked even if server did not send any size
+    if filepath.endswith('.h5.part') and not is_complete_h5_file(filepath):
+        raise ValueError('incomplete or invalid HDF5 file')
+
+
+def download_file(opener, url, credentials, filepath):
+    """Download url to filepath and return number of bytes transferred (None: file was already complete).
+
+    Data is streamed to filepath + '.part', renamed to filepath only after verification.
+    An interrupted download keeps its .part file and is resumed by the next run (HTTP Range request).
+    """
+    # files are only renamed into place after verification; H5 files of older runs are checked again
+    part_filepath = filepath + '.part'
+    if os.path.exists(filepath) and (not filepath.endswith('.h5') or is_complete_h5_file(filepath)):
+        if os.path.exists(part_filepath):
+            os.remove(part_filepath)
+        return None
+
+    offset = os.path.getsize(part_filepath) if os.path.exists(part_filepath) else 0
+
+    # previous run was interrupted between end of transfer and rename
+    if offset > 0 and filepath.endswith('.h5') and is_complete_h5_file(part_filepath):
+        os.replace(part_filepath, filepath)
+        return 0
+
+    # In Python 3 we could eliminate the opener and just do 2 lines:
+    # resp = requests.get(url, auth=(username, password))
+    # open(filename, 'wb').write(resp.content)
+    req = Request(url)
+    if credentials:
+        req.add_header('Authorization', 'Basic {0}'.format(credentials))
+    if offset > 0:
+        req.add_header('Range', 'bytes={0}-'.format(offset))
+
+    try:
+        response = opener.open(req)
+    except HTTPError as e:
+        if e.code != 416 or offset == 0:
+            raise
+        # range not satisfiable: .part file is not a prefix of remote file, download again from start
+        os.remove(part_filepath)
+        return download_file(opener, url, credentials, filepath)
+
+    with response:
+        if response.status != 206:
+            offset = 0  # server ignored range request: whole file is sent again
+        expected_size = get_expected_size(response)
+
+        number_of_bytes = 0
+        with open(part_filepath, 'ab' if offset > 0 else 'wb') as f:
+            while True:
+                chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                number_of_bytes += len(chunk)
+
+    try:
+        verify_download(part_filepath, expected_size)
+    except ValueError:
+        # corrupt data cannot be resumed
+        os.remove(part_filepath)
+        raise
+
+    # atomic rename: later steps never see a partial file under its final name
+    os.replace(part_filepath, filepath)
+
+    return number_of_bytes
+
+
+def read_remote_range(opener, url, credentials, start, end):
+
+    req = Request(url)
+    if credentials:
+        req.add_header('Authorization', 'Basic {0}'.format(credentials))
+    req.add_header('Range', 'bytes={0}-{1}'.format(start, end))
+
+    with opener.open(req) as response:
+        if response.status != 206:
+            raise ValueError('server does not support range requests')
+        total_size = get_expected_size(response)
+        data = response.read()
+
+    if len(data) != end - start + 1 and start + len(data) != total_size:
+        raise IncompleteRead(data, end - start + 1 - len(data))
+
+    return data, total_size
+
+
+def download_h5_subset(opener, url, credentials, filepath, object_paths):
+    """Copy h5 objects (datasets, groups with attributes) of remote url to a slim h5 file and return bytes transferred.
+
+    Only the byte ranges read by the HDF5 library (superblock, object headers, chunk index and chunks of the
+    requested datasets) are fetched with HTTP Range requests. The slim file keeps the original paths.
+    """
+    part_filepath = filepath + '.part'
+    if os.path.exists(filepath) and is_complete_h5_file(filepath):
+        if os.path.exists(part_filepath):
+            os.remove(part_filepath)
+        return None
+
+    # first block gives total file size (Content-Range)
+    first_block, total_size = read_remote_range(opener, url, credentials, 0, H5_RANGE_BLOCK_SIZE - 1)
+
+    def read_range(start, end):
+        return read_remote_range(opener, url, credentials, start, end)[0]
+
+    range_file = RangeFile(read_range, total_size, H5_RANGE_BLOCK_SIZE, first_block)
+    try:
+        with h5py.File(range_file, 'r') as h5_in:
+            copy_h5_objects(h5_in, part_filepath, object_paths)
+    except (OSError, KeyError):
+        if os.path.exists(part_filepath):
+            os.remove(part_filepath)
+        # HDF5 library reports network errors as read errors: raise original error
+        if range_file.error is not None:
+            raise range_file.error
+        raise ValueError('requested h5 objects not found: {0}'.format(', '.join(object_paths)))
+
+    verify_download(part_filepath, None)
+    os.replace(part_filepath, filepath)
+
+    return range_file.bytes_fetched
+
+
+def format_throughput(number_of_bytes, duration):
+    return '{0:.1f} MB in {1:.1f} s ({2:.2f} MB/s)'.format(number_of_bytes / 1024 / 1024, duration,
+                                                          number_of_bytes / 1024 / 1024 / max(duration, 1e-6))
+
+
+def cmr_download(urls, directory, max_workers=1, h5_object_paths=None):
+    """Download files from list of urls, with max_workers parallel downloads sharing one cookie session.
+
+    If h5_object_paths is given, only these h5 objects are downloaded (see download_h5_subset).
+    """
     if not urls:
         return
 
     url_count = len(urls)
-    print('Downloading {0} files...'.format(url_count))
+    print('Downloading {0} files with {1} workers...'.format(url_count, max_workers))
     credentials = None
 
-    for index, url in enumerate(urls, start=1):
-        if not credentials and urlparse(url).scheme == 'https':
+    # credentials are requested once, before downloads start (prompt must not run in worker threads)
+    for url in urls:
+        if urlparse(url).scheme == 'https':
             credentials = get_credentials(url)
+            break
 
+    opener = build_download_opener()
+    print_lock = threading.Lock()
+    counters = {'done': 0, 'downloaded': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+
+    def download(url):
         filename = url.split('/')[-1]
         filepath = directory + '/' + filename
-        print('{0}/{1}: {2}'.format(str(index).zfill(len(str(url_count))),
-                                    url_count,
-                                    filename))
+        start_time = time.monotonic()
 
+        number_of_bytes = 0
         try:
-            # In Python 3 we could eliminate the opener and just do 2 lines:
-            # resp = requests.get(url, auth=(username, password))
-            # open(filename, 'wb').write(resp.content)
-            req = Request(url)
-            if credentials:
-                req.add_header('Authorization', 'Basic {0}'.format(credentials))
-            opener = build_opener(HTTPCookieProcessor())
-            data = opener.open(req).read()
-            open(filepath, 'wb').write(data)
+            if h5_object_paths:
+                number_of_bytes = download_h5_subset(opener, url, credentials, filepath, h5_object_paths)
+            else:
+                number_of_bytes = download_file(opener, url, credentials, filepath)
+            if number_of_bytes is None:
+                status = 'skipped'
+                message = '{0}: already downloaded'.format(filename)
+            else:
+                status = 'downloaded'
+                message = '{0}: {1}'.format(filename, format_throughput(number_of_bytes,
+                                                                         time.monotonic() - start_time))
         except HTTPError as e:
-            print('HTTP error {0}, {1}'.format(e.code, e.reason))
+            status = 'failed'
+            message = '{0}: HTTP error {1}, {2}'.format(filename, e.code, e.reason)
         except URLError as e:
-            print('URL error: {0}'.format(e.reason))
-        except IOError:
-            raise
-        except KeyboardInterrupt:
-            quit()
\ No newline at end of file
+            status = 'failed'
+            message = '{0}: URL error: {1}'.format(filename, e.reason)
+        except (HTTPException, ConnectionError, TimeoutError) as e:
+            # connection lost during transfer: .part file is kept and resumed by the next run
+            status = 'failed'
+            message = '{0}: transfer interrupted ({1}), will resume on next run'.format(filename, type(e).__name__)
+        except ValueError as e:
+            status = 'failed'
+            message = '{0}: verification failed, {1}'.format(filename, e)
+
+        with print_lock:
+            counters['done'] += 1
+            counters[status] += 1
+            counters['bytes'] += number_of_bytes or 0
+            print('{0}/{1}: {2}'.format(str(counters['done']).zfill(len(str(url_count))), url_count, message))
+
+    start_time = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        # first download alone: it goes through the URS redirect chain and sets the session cookie for all workers
+        executor.submit(download, urls[0]).result()
+
+        # IOError (e.g. disk full) is raised by future.result() and stops all downloads
+        for future in as_completed([executor.submit(download, url) for url in urls[1:]]):
+            future.result()
+    except KeyboardInterrupt:
+        executor.shutdown(wait=False, cancel_futures=True)
+        quit()
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    print('Downloaded {0} files, {1} skipped, {2} failed: {3}'.format(counters['downloaded'], counters['skipped'],
+                                                                     counters['failed'],
+                                                                     format_throughput(counters['bytes'],
+                                                                                       time.monotonic() - start_time)))
@@ -0,0 +1,147 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... bounding box coverage util functions
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+from shapely.geometry import Polygon
+from shapely.ops import unary_union
+from shapely.prepared import prep
+
+# relative tolerance on covered area, before running the exact "within" test
+COVERAGE_AREA_TOLERANCE = 1e-9
+
+# per-run footprint cache: granule key (coordinate string or producer granule id) -> (polygon, prepared polygon)
+footprint_cache = {}
+footprint_cache_counters = {'parses': 0, 'hits': 0}
+
+
+def get_polygon(coordinate_string):
+    # lat/long NSIDC format
+    n_coords = coordinate_string.split()
+
+    # create polygon (coordinates in lon/lat GIS format)
+    g_coords = [(float(n_coords[1]), float(n_coords[0])), (float(n_coords[3]), float(n_coords[2])),
+                (float(n_coords[5]), float(n_coords[4])),
+                (float(n_coords[7]), float(n_coords[6]))]
+
+    result = Polygon(g_coords)
+    return result
+
+
+def get_footprint(coordinate_string, key=None):
+
+    # parse each granule footprint only once: SPL2SMAP_S footprints are tiles, which come back on many dates
+    if key is None:
+        key = coordinate_string
+
+    footprint = footprint_cache.get(key)
+    if footprint is None:
+        polygon = get_polygon(coordinate_string)
+        footprint = (polygon, prep(polygon))
+        footprint_cache[key] = footprint
+        footprint_cache_counters['parses'] += 1
+    else:
+        footprint_cache_counters['hits'] += 1
+
+    return footprint
+
+
+def get_footprint_cache_info():
+
+    parses = footprint_cache_counters['parses']
+    hits = footprint_cache_counters['hits']
+    lookups = parses + hits
+
+    return {'size': len(footprint_cache),
+            'parses': parses,
+            'hits': hits,
+            'hit_ratio': hits / lookups if lookups > 0 else 0.0}
+
+
+def clear_footprint_cache():
+    footprint_cache.clear()
+    footprint_cache_counters['parses'] = 0
+    footprint_cache_counters['hits'] = 0
+
+
+def find_covering_combination(bb_polygon, polygons, prepared_polygons=None):
+    """Return indices of the smallest combination of polygons including the bounding box, or [] if none does.
+
+    Combinations are searched by size, then in ascending index order: the first including combination is the same as
+    the one found by testing all 2^n combinations one after the other, but without enumerating the power set.
+    Prepared polygons (see get_footprint) speed up the containment and intersection tests.
+    """
+    if not polygons:
+        return []
+
+    if prepared_polygons is None:
+        prepared_polygons = [prep(polygon) for polygon in polygons]
+
+    # combinations of size 1: containment test on prepared polygons
+    for index, prepared_polygon in enumerate(prepared_polygons):
+        if prepared_polygon.contains(bb_polygon):
+            return [index]
+
+    bb_area = bb_polygon.area
+    required_area = bb_area * (1 - COVERAGE_AREA_TOLERANCE)
+
+    # only the part of each polygon inside the bounding box contributes to coverage
+    pieces = [bb_polygon.intersection(polygon) if prepared_polygon.intersects(bb_polygon) else None
+              for polygon, prepared_polygon in zip(polygons, prepared_polygons)]
+    areas = [piece.area if piece is not None else 0.0 for piece in pieces]
+
+    # polygons without area inside the bounding box are never part of a smallest including combination
+    candidates = [i for i in range(len(polygons)) if areas[i] > 0]
+
+    # early exit: if all polygons together do not include the bounding box, no combination does
+    if not candidates or not bb_polygon.within(unary_union([polygons[i] for i in candidates])):
+        return []
+
+    # lower bound: the k largest pieces must at least fill the bounding box area
+    sorted_areas = sorted((areas[i] for i in candidates), reverse=True)
+    min_size = 2
+    while min_size < len(sorted_areas) and sum(sorted_areas[:min_size]) < required_area:
+        min_size += 1
+
+    def search(size, start, combination, union, covered_area):
+        remaining = size - len(combination)
+
+        if remaining == 0:
+            # area pre-check, then exact test on the original polygons (same test as before)
+            if covered_area < required_area:
+                return None
+            if bb_polygon.within(unary_union([polygons[i] for i in combination])):
+                return combination
+            return None
+
+        for position in range(start, len(candidates) - remaining + 1):
+            # bound: even the largest remaining pieces cannot fill the uncovered area
+            # the bound only decreases with position, so no later position can succeed either
+            best_gain = sum(sorted((areas[i] for i in candidates[position:]), reverse=True)[:remaining])
+            if covered_area + best_gain < required_area:
+                break
+
+            index = candidates[position]
+            extended_union = pieces[index] if union is None else union.union(pieces[index])
+            if extended_union.area - covered_area <= 0.0:
+                # no area gain: a combination with a redundant polygon is never the smallest one
+                # (strictly no gain only: a sliver below the area tolerance can still close the last gap)
+                continue
+            result = search(size, position + 1, combination + [index], extended_union, extended_union.area)
+            if result is not None:
+                return result
+
+        return None
+
+    # all candidates together include the bounding box: the search ends at the latest with size len(candidates)
+    for size in range(min_size, len(candidates) + 1):
+        including_combination = search(size, 0, [], None, 0.0)
+        if including_combination is not None:
+            return including_combination
+
+    return []
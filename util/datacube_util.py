@@ -0,0 +1,132 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... datacube util functions (time-stacked rasters on a common grid, HDF5)
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import math
+import os
+import h5py
+import numpy as np
+
+# datacube layout:
+# /values   float32 (date, y, x), chunked along dates: the time series of a pixel is stored in one chunk
+# /date     date index ('YYYY-MM-DD'), same order as first axis of /values
+# attributes of /values: geotransform (GDAL order), crs
+DATACUBE_FILL_VALUE = -9999.0
+DATACUBE_CHUNK_DATES = 512
+DATACUBE_CHUNK_PIXELS = 8
+# chunk cache for appends: all chunks of a date layer stay in memory between two appends
+DATACUBE_CHUNK_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def get_datacube_grid(aoi, resolution):
+
+    # aoi: (min lon, min lat, max lon, max lat); grid is aligned on multiples of resolution
+    min_lon, min_lat, max_lon, max_lat = aoi
+    x_origin = math.floor(min_lon / resolution) * resolution
+    y_origin = math.ceil(max_lat / resolution) * resolution
+    ncols = int(math.ceil((max_lon - x_origin) / resolution))
+    nrows = int(math.ceil((y_origin - min_lat) / resolution))
+
+    return (x_origin, resolution, 0, y_origin, 0, -resolution), (nrows, ncols)
+
+
+def regrid_nearest(np_data, geotransform, grid_geotransform, grid_shape):
+    """Return np_data resampled (nearest pixel) to grid; grid pixels outside of np_data get DATACUBE_FILL_VALUE.
+
+    Both grids are north-up: the index mapping is separable, one column index per grid column and one row index
+    per grid row.
+    """
+    nrows, ncols = grid_shape
+    x = grid_geotransform[0] + (np.arange(ncols) + 0.5) * grid_geotransform[1]
+    y = grid_geotransform[3] + (np.arange(nrows) + 0.5) * grid_geotransform[5]
+
+    cols = np.floor((x - geotransform[0]) / geotransform[1]).astype(np.int64)
+    rows = np.floor((y - geotransform[3]) / geotransform[5]).astype(np.int64)
+    valid_cols = (cols >= 0) & (cols < np_data.shape[1])
+    valid_rows = (rows >= 0) & (rows < np_data.shape[0])
+
+    layer = np.full(grid_shape, DATACUBE_FILL_VALUE, dtype=np.float32)
+    layer[np.ix_(valid_rows, valid_cols)] = np_data[np.ix_(rows[valid_rows], cols[valid_cols])]
+
+    return layer
+
+
+def create_datacube(filepath, grid_geotransform, grid_shape, crs='EPSG:4326'):
+
+    # existing datacube is kept if it has the same grid (new dates are appended)
+    if os.path.exists(filepath):
+        with h5py.File(filepath, 'r') as h5_file:
+            values = h5_file['values']
+            if tuple(values.shape[1:]) != tuple(grid_shape) or \
+                    not np.allclose(values.attrs['geotransform'], grid_geotransform):
+                raise ValueError('datacube ' + filepath + ' has another grid (delete it to start a new datacube)')
+        return
+
+    with h5py.File(filepath, 'w') as h5_file:
+        chunks = (DATACUBE_CHUNK_DATES, min(DATACUBE_CHUNK_PIXELS, grid_shape[0]),
+                  min(DATACUBE_CHUNK_PIXELS, grid_shape[1]))
+        values = h5_file.create_dataset('values', shape=(0,) + tuple(grid_shape), maxshape=(None,) + tuple(grid_shape),
+                                        dtype='float32', chunks=chunks, fillvalue=DATACUBE_FILL_VALUE)
+        values.attrs['geotransform'] = np.array(grid_geotransform, dtype=np.float64)
+        values.attrs['crs'] = crs
+        h5_file.create_dataset('date', shape=(0,), maxshape=(None,), dtype='S10', chunks=(DATACUBE_CHUNK_DATES,))
+
+
+def append_to_datacube(filepath, dates, layers):
+
+    # layers: arrays on datacube grid (see regrid_nearest); layers of dates already in datacube are replaced
+    with h5py.File(filepath, 'a', rdcc_nbytes=DATACUBE_CHUNK_CACHE_BYTES) as h5_file:
+        values = h5_file['values']
+        date_index = h5_file['date']
+        positions = {date.decode('ascii'): position for position, date in enumerate(date_index[:])}
+
+        new_dates = [date for date in dates if date not in positions]
+        if new_dates:
+            number_of_dates = values.shape[0]
+            values.resize(number_of_dates + len(new_dates), axis=0)
+            date_index.resize(number_of_dates + len(new_dates), axis=0)
+            date_index[number_of_dates:] = np.array(new_dates, dtype='S10')
+            for offset, date in enumerate(new_dates):
+                positions[date] = number_of_dates + offset
+
+        for date, layer in zip(dates, layers):
+            values[positions[date]] = layer
+
+
+def read_datacube_dates(filepath):
+    with h5py.File(filepath, 'r') as h5_file:
+        return [date.decode('ascii') for date in h5_file['date'][:]]
+
+
+def read_datacube_layer(filepath, date):
+
+    # returns (array, geotransform) of one date, or None if date is not in datacube
+    with h5py.File(filepath, 'r') as h5_file:
+        dates = [value.decode('ascii') for value in h5_file['date'][:]]
+        if date not in dates:
+            return None
+        values = h5_file['values']
+        return values[dates.index(date)], tuple(values.attrs['geotransform'])
+
+
+def read_datacube_time_series(filepath, lon, lat):
+    """Return (dates, values) of the pixel including (lon, lat), sorted by date (one read along the date axis)."""
+    with h5py.File(filepath, 'r') as h5_file:
+        values = h5_file['values']
+        geotransform = values.attrs['geotransform']
+        col = int(math.floor((lon - geotransform[0]) / geotransform[1]))
+        row = int(math.floor((lat - geotransform[3]) / geotransform[5]))
+        if not (0 <= row < values.shape[1] and 0 <= col < values.shape[2]):
+            raise ValueError('point ({0}, {1}) is outside of datacube'.format(lon, lat))
+
+        time_series = values[:, row, col]
+        dates = np.array([date.decode('ascii') for date in h5_file['date'][:]])
+
+    order = np.argsort(dates, kind='stable')
+    return dates[order].tolist(), time_series[order]
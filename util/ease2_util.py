@@ -0,0 +1,164 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... EASE-Grid 2.0 util functions (resampling of SMAP 1 km tiles to a regular WGS84 grid)
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import functools
+import math
+import numpy as np
+
+# EASE-Grid 2.0 global 1 km grid (EPSG:6933, cylindrical equal-area, standard parallel 30°N/S, WGS84 ellipsoid)
+# https://nsidc.org/data/user-resources/help-center/guide-ease-grids
+EASE2_SEMI_MAJOR_AXIS = 6378137.0
+EASE2_ECCENTRICITY = 0.081819190842621
+EASE2_STANDARD_PARALLEL = 30.0
+EASE2_CELL_SIZE_1KM = 1000.89502334956
+EASE2_NUMBER_OF_COLUMNS_1KM = 34704
+EASE2_NUMBER_OF_ROWS_1KM = 14616
+# map coordinates of upper left corner of grid
+EASE2_X_ORIGIN_1KM = -EASE2_NUMBER_OF_COLUMNS_1KM / 2 * EASE2_CELL_SIZE_1KM
+EASE2_Y_ORIGIN_1KM = EASE2_NUMBER_OF_ROWS_1KM / 2 * EASE2_CELL_SIZE_1KM
+
+EASE2_ROW_INDEX_DATASET = 'Soil_Moisture_Retrieval_Data_1km/EASE_row_index_1km'
+EASE2_COLUMN_INDEX_DATASET = 'Soil_Moisture_Retrieval_Data_1km/EASE_column_index_1km'
+
+
+def get_ease2_scale_factor():
+    # scale factor along standard parallel
+    sin_phi = math.sin(math.radians(EASE2_STANDARD_PARALLEL))
+    return math.cos(math.radians(EASE2_STANDARD_PARALLEL)) / math.sqrt(1 - (EASE2_ECCENTRICITY * sin_phi) ** 2)
+
+
+def get_authalic_q(sin_phi):
+    e = EASE2_ECCENTRICITY
+    return (1 - e ** 2) * (sin_phi / (1 - (e * sin_phi) ** 2) -
+                           1 / (2 * e) * np.log((1 - e * sin_phi) / (1 + e * sin_phi)))
+
+
+# Snyder, Map Projections - A Working Manual, p. 76-85 (cylindrical equal-area, ellipsoid)
+# https://pubs.usgs.gov/publication/pp1395
+def lon_lat_to_ease2_xy(lon, lat):
+    k0 = get_ease2_scale_factor()
+    x = EASE2_SEMI_MAJOR_AXIS * k0 * np.radians(lon)
+    y = EASE2_SEMI_MAJOR_AXIS * get_authalic_q(np.sin(np.radians(lat))) / (2 * k0)
+    return x, y
+
+
+def ease2_xy_to_lon_lat(x, y):
+    k0 = get_ease2_scale_factor()
+    e2 = EASE2_ECCENTRICITY ** 2
+    lon = np.degrees(x / (EASE2_SEMI_MAJOR_AXIS * k0))
+
+    # authalic latitude, then geodetic latitude (series)
+    beta = np.arcsin(2 * y * k0 / (EASE2_SEMI_MAJOR_AXIS * get_authalic_q(1.0)))
+    lat = np.degrees(beta + (e2 / 3 + 31 * e2 ** 2 / 180 + 517 * e2 ** 3 / 5040) * np.sin(2 * beta) +
+                     (23 * e2 ** 2 / 360 + 251 * e2 ** 3 / 3780) * np.sin(4 * beta) +
+                     761 * e2 ** 3 / 45360 * np.sin(6 * beta))
+    return lon, lat
+
+
+def get_ease2_tile(h5_file, shape):
+    """Return (first row, first column, number of rows, number of columns) of h5 file in global EASE-2 1 km grid.
+
+    SMAP/Sentinel 1 km granules are fixed tiles of the global grid. Without EASE index datasets (e.g. slim h5 files),
+    the tile is located from the pixel centers of the extent polygon.
+    """
+    nrows, ncols = shape
+    if EASE2_ROW_INDEX_DATASET in h5_file and EASE2_COLUMN_INDEX_DATASET in h5_file:
+        return int(h5_file[EASE2_ROW_INDEX_DATASET][0, 0]), int(h5_file[EASE2_COLUMN_INDEX_DATASET][0, 0]), nrows, ncols
+
+    coords = h5_file["/Metadata/Extent"].attrs['polygonPosList']
+    x, y = lon_lat_to_ease2_xy(float(min(coords[1], coords[3])), float(max(coords[0], coords[4])))
+    first_col = int(math.floor((x - EASE2_X_ORIGIN_1KM) / EASE2_CELL_SIZE_1KM))
+    first_row = int(math.floor((EASE2_Y_ORIGIN_1KM - y) / EASE2_CELL_SIZE_1KM))
+
+    return first_row, first_col, nrows, ncols
+
+
+def get_ease2_tile_bounds(tile):
+
+    # (min lon, min lat, max lon, max lat) of tile, pixel edges included
+    first_row, first_col, nrows, ncols = tile
+    min_lon, max_lat = ease2_xy_to_lon_lat(EASE2_X_ORIGIN_1KM + first_col * EASE2_CELL_SIZE_1KM,
+                                           EASE2_Y_ORIGIN_1KM - first_row * EASE2_CELL_SIZE_1KM)
+    max_lon, min_lat = ease2_xy_to_lon_lat(EASE2_X_ORIGIN_1KM + (first_col + ncols) * EASE2_CELL_SIZE_1KM,
+                                           EASE2_Y_ORIGIN_1KM - (first_row + nrows) * EASE2_CELL_SIZE_1KM)
+
+    return float(min_lon), float(min_lat), float(max_lon), float(max_lat)
+
+
+def get_target_grid(tile, resolution, aoi=None):
+    """Return (GDAL geotransform, shape) of WGS84 grid covering tile (and aoi), or None if tile does not cover aoi.
+
+    Grid is aligned on multiples of resolution: grids of the same tile (and of neighbouring tiles) fit together.
+    """
+    min_lon, min_lat, max_lon, max_lat = get_ease2_tile_bounds(tile)
+    if aoi is not None:
+        min_lon, min_lat = max(min_lon, aoi[0]), max(min_lat, aoi[1])
+        max_lon, max_lat = min(max_lon, aoi[2]), min(max_lat, aoi[3])
+        if min_lon >= max_lon or min_lat >= max_lat:
+            return None
+
+    first_col = int(math.floor(min_lon / resolution))
+    first_row = int(math.floor(-max_lat / resolution))
+    ncols = int(math.ceil(max_lon / resolution)) - first_col
+    nrows = int(math.ceil(-min_lat / resolution)) - first_row
+
+    return (first_col * resolution, resolution, 0, -first_row * resolution, 0, -resolution), (nrows, ncols)
+
+
+@functools.lru_cache(maxsize=64)
+def get_lookup_table(tile, grid_geotransform, grid_shape):
+    """Return (source rows, source columns) of tile pixels including target grid pixel centers (-1: outside tile).
+
+    EASE-2 is cylindrical: source row only depends on target row (latitude) and source column on target column
+    (longitude), i.e. the lookup table is two index vectors. It is computed once per (tile, target grid) in each
+    process and applied to every granule of the tile with resample_to_grid.
+    """
+    first_row, first_col, nrows, ncols = tile
+    lon = grid_geotransform[0] + (np.arange(grid_shape[1]) + 0.5) * grid_geotransform[1]
+    lat = grid_geotransform[3] + (np.arange(grid_shape[0]) + 0.5) * grid_geotransform[5]
+    x, _ = lon_lat_to_ease2_xy(lon, 0.0)
+    _, y = lon_lat_to_ease2_xy(0.0, lat)
+
+    cols = np.floor((x - EASE2_X_ORIGIN_1KM) / EASE2_CELL_SIZE_1KM).astype(np.int64) - first_col
+    rows = np.floor((EASE2_Y_ORIGIN_1KM - y) / EASE2_CELL_SIZE_1KM).astype(np.int64) - first_row
+    cols[(cols < 0) | (cols >= ncols)] = -1
+    rows[(rows < 0) | (rows >= nrows)] = -1
+
+    # lookup table is shared by all calls: read only
+    rows.flags.writeable = False
+    cols.flags.writeable = False
+
+    return rows, cols
+
+
+def get_source_window(lookup_table):
+
+    # (row start, row stop, column start, column stop) of tile pixels used by lookup table, or None
+    rows, cols = lookup_table
+    valid_rows = rows[rows >= 0]
+    valid_cols = cols[cols >= 0]
+    if valid_rows.size == 0 or valid_cols.size == 0:
+        return None
+
+    return int(valid_rows.min()), int(valid_rows.max()) + 1, int(valid_cols.min()), int(valid_cols.max()) + 1
+
+
+def resample_to_grid(np_window, window, lookup_table, fill_value):
+    """Return np_window (band, row, column), read from window of tile, resampled to target grid (nearest pixel)."""
+    rows, cols = lookup_table
+    row_start, _, col_start, _ = window
+    valid_rows = rows >= 0
+    valid_cols = cols >= 0
+
+    np_data = np.full((np_window.shape[0], rows.size, cols.size), fill_value, dtype=np_window.dtype)
+    np_data[:, valid_rows[:, None] & valid_cols[None, :]] = \
+        np_window[:, rows[valid_rows] - row_start][:, :, cols[valid_cols] - col_start].reshape(np_window.shape[0], -1)
+
+    return np_data
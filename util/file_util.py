@@ -10,7 +10,10 @@ Last changed on.. 02.05.2022
 
 import pandas as pd
 import os
+import json
 import shutil
+import sqlite3
+from openpyxl import Workbook
 
 
 # Delete all files in a directory in Python
@@ -21,6 +24,110 @@ def delete_complete_directory(directory):
         print(directory + ' deleted')
 
 
+def rows_to_xlsx(filepath, columns, rows):
+
+    # write-only workbook: rows are streamed to the file one after the other, nothing is kept in memory
+    # rows may be any iterable (e.g. a generator): the file is only saved if at least one row was written
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Sheet1')  # same sheet name as DataFrame.to_excel
+    worksheet.append(columns)
+
+    number_of_rows = 0
+    try:
+        for row in rows:
+            # empty strings are written as empty cells, as with DataFrame.to_excel
+            worksheet.append([value if value != '' else None for value in row])
+            number_of_rows += 1
+    except BaseException:
+        # rows generator failed or was interrupted: close worksheet stream, no file is saved
+        worksheet.close()
+        raise
+
+    if number_of_rows > 0:
+        workbook.save(filepath)
+
+    return number_of_rows
+
+
+# selection manifest: typed SQLite file with 1 row per date
+# list columns 'items' (indexes of polygons required for coverage) and 'urls' (all urls of date) are JSON arrays
+def rows_to_manifest(filepath, rows):
+
+    # rows: [date, KML filename, nb_required_polygons, nb_total_polygons, item list, url list]
+    # write to temporary file first: steps 02 and 03 never see an incomplete manifest
+    temp_filepath = filepath + '.tmp'
+    if os.path.exists(temp_filepath):
+        os.remove(temp_filepath)
+
+    conn = sqlite3.connect(temp_filepath)
+    conn.execute('''CREATE TABLE selection (
+        date TEXT PRIMARY KEY,
+        kml_filename TEXT,
+        nb_required_polygons INTEGER,
+        nb_total_polygons INTEGER,
+        items TEXT,
+        urls TEXT);''')
+
+    number_of_rows = 0
+    try:
+        for row in rows:
+            conn.execute('INSERT INTO selection VALUES (?, ?, ?, ?, ?, ?);',
+                         (row[0], row[1], row[2], row[3], json.dumps(row[4]), json.dumps(row[5])))
+            number_of_rows += 1
+        conn.commit()
+    except BaseException:
+        # rows generator failed or was interrupted: no manifest is saved
+        conn.close()
+        os.remove(temp_filepath)
+        raise
+    conn.close()
+
+    # the manifest is only saved if at least one row was written
+    if number_of_rows > 0:
+        os.replace(temp_filepath, filepath)
+    else:
+        os.remove(temp_filepath)
+
+    return number_of_rows
+
+
+def manifest_to_dataframe(filepath):
+
+    conn = sqlite3.connect(filepath)
+    df = pd.read_sql_query('SELECT date, items, urls FROM selection ORDER BY date;', conn)
+    conn.close()
+
+    # JSON arrays to Python lists (no string splitting, no row-wise apply)
+    df['items'] = [json.loads(items) for items in df['items']]
+    df['urls'] = [json.loads(urls) for urls in df['urls']]
+
+    return df
+
+
+def manifest_to_xlsx(manifest_filepath, xlsx_filepath, columns):
+
+    # human-readable export: list columns are saved to single cells as PIPE-separated strings (|)
+    conn = sqlite3.connect(manifest_filepath)
+    cursor = conn.execute('SELECT date, kml_filename, nb_required_polygons, nb_total_polygons, items, urls '
+                          'FROM selection ORDER BY date;')
+    rows = ([row[0], row[1], row[2], row[3], '|'.join(str(item) for item in json.loads(row[4])),
+             '|'.join(json.loads(row[5]))] for row in cursor)
+    number_of_rows = rows_to_xlsx(xlsx_filepath, columns, rows)
+    conn.close()
+
+    return number_of_rows
+
+
+def read_selection(selection_file):
+
+    # dataframe value columns: ['date', 'items', 'urls']
+    # selection manifests (.sqlite) are written by 01_search_and_filter_h5.py; Excel files are older selections
+    if selection_file.endswith('.sqlite'):
+        return manifest_to_dataframe(selection_file)
+    else:
+        return xlsx_to_dataframe(selection_file)
+
+
 def xlsx_to_dataframe(filepath):
 
     # requires openpyxl
@@ -0,0 +1,190 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... granule store util functions (content-addressed h5 files shared by all projects)
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+# store layout:
+# <store directory>/granule_store.sqlite        index: granule id -> SHA-256, size, last access + project references
+# <store directory>/objects/ab/ab12...ef.h5     h5 files, named by SHA-256 of their content
+# <store directory>/incoming                    downloads in progress (see cmr_download)
+
+
+def open_granule_store(store_directory):
+
+    if not os.path.exists(store_directory + '/objects'):
+        os.makedirs(store_directory + '/objects')
+
+    # store is shared by several projects: wait for other runs instead of failing on a locked database
+    conn = sqlite3.connect(store_directory + '/granule_store.sqlite', timeout=60)
+    cursor = conn.cursor()
+
+    # granule id = h5 filename (producer granule id); partial granules only hold some h5 objects (slim files)
+    cursor.execute('''CREATE TABLE IF NOT EXISTS granule (
+        granule_id TEXT PRIMARY KEY,
+        sha256 TEXT,
+        size INTEGER,
+        is_partial INTEGER,
+        url TEXT,
+        stored_on REAL,
+        last_access REAL);''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS granule_sha256 ON granule (sha256);')
+    cursor.execute('CREATE INDEX IF NOT EXISTS granule_last_access ON granule (last_access);')
+
+    # granules used by each project (watershed)
+    cursor.execute('''CREATE TABLE IF NOT EXISTS reference (
+        project TEXT,
+        granule_id TEXT,
+        referenced_on REAL,
+        PRIMARY KEY (project, granule_id));''')
+
+    conn.commit()
+
+    return conn
+
+
+def get_store_object_filepath(store_directory, sha256):
+    return store_directory + '/objects/' + sha256[:2] + '/' + sha256 + '.h5'
+
+
+def get_file_sha256(filepath):
+
+    sha256 = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+
+    return sha256.hexdigest()
+
+
+def delete_granule(conn, store_directory, granule_id, sha256):
+
+    conn.execute('DELETE FROM granule WHERE granule_id = ?;', (granule_id,))
+    conn.execute('DELETE FROM reference WHERE granule_id = ?;', (granule_id,))
+
+    # object file may be shared by several granule ids (identical content)
+    if conn.execute('SELECT COUNT(*) FROM granule WHERE sha256 = ?;', (sha256,)).fetchone()[0] == 0:
+        object_filepath = get_store_object_filepath(store_directory, sha256)
+        if os.path.exists(object_filepath):
+            os.remove(object_filepath)
+
+
+def find_granule(conn, store_directory, granule_id, allow_partial=True):
+    """Return filepath of granule in store, or None if granule is not stored (or only partially, if not allowed)."""
+    row = conn.execute('SELECT sha256, size, is_partial FROM granule WHERE granule_id = ?;', (granule_id,)).fetchone()
+    if row is None:
+        return None
+
+    sha256, size, is_partial = row
+    if is_partial and not allow_partial:
+        return None
+
+    # object file was deleted outside of the store: forget granule
+    object_filepath = get_store_object_filepath(store_directory, sha256)
+    if not os.path.exists(object_filepath) or os.path.getsize(object_filepath) != size:
+        delete_granule(conn, store_directory, granule_id, sha256)
+        conn.commit()
+        return None
+
+    return object_filepath
+
+
+def add_granule(conn, store_directory, granule_id, filepath, url, is_partial):
+
+    # file is moved into store (or deleted, if store already holds the same content)
+    sha256 = get_file_sha256(filepath)
+    size = os.path.getsize(filepath)
+    object_filepath = get_store_object_filepath(store_directory, sha256)
+
+    if os.path.exists(object_filepath):
+        os.remove(filepath)
+    else:
+        if not os.path.exists(os.path.dirname(object_filepath)):
+            os.makedirs(os.path.dirname(object_filepath))
+        os.replace(filepath, object_filepath)
+
+    # a complete granule replaces a partial one
+    row = conn.execute('SELECT sha256 FROM granule WHERE granule_id = ?;', (granule_id,)).fetchone()
+    if row is not None and row[0] != sha256:
+        conn.execute('UPDATE granule SET sha256 = ? WHERE granule_id = ?;', (sha256, granule_id))
+        if conn.execute('SELECT COUNT(*) FROM granule WHERE sha256 = ?;', (row[0],)).fetchone()[0] == 0:
+            os.remove(get_store_object_filepath(store_directory, row[0]))
+
+    now = time.time()
+    conn.execute('''INSERT INTO granule (granule_id, sha256, size, is_partial, url, stored_on, last_access)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (granule_id) DO UPDATE SET sha256 = excluded.sha256, size = excluded.size,
+        is_partial = excluded.is_partial, url = excluded.url, stored_on = excluded.stored_on,
+        last_access = excluded.last_access;''',
+                 (granule_id, sha256, size, int(is_partial), url, now, now))
+    conn.commit()
+
+    return object_filepath
+
+
+def reference_granules(conn, project, granule_ids):
+
+    # reference + last access time, for LRU eviction
+    now = time.time()
+    conn.executemany('INSERT OR REPLACE INTO reference (project, granule_id, referenced_on) VALUES (?, ?, ?);',
+                     [(project, granule_id, now) for granule_id in granule_ids])
+    conn.executemany('UPDATE granule SET last_access = ? WHERE granule_id = ?;',
+                     [(now, granule_id) for granule_id in granule_ids])
+    conn.commit()
+
+
+def release_granules(conn, project):
+
+    # project (watershed) no longer needs its granules: they can be evicted, unless another project references them
+    number_of_references = conn.execute('DELETE FROM reference WHERE project = ?;', (project,)).rowcount
+    conn.commit()
+    print('granule store: {0} references of project {1} released'.format(number_of_references, project))
+
+
+def evict_granule_store(conn, store_directory, max_size_bytes, keep_granule_ids=()):
+    """Delete least recently used granules until store size is below max_size_bytes.
+
+    Granules referenced by a project (see reference_granules, release_granules) and keep_granule_ids are never
+    evicted: a granule downloaded by one run is still in store when step 03 of any project converts it.
+    """
+    rows = conn.execute('''SELECT granule_id, sha256, size,
+        EXISTS (SELECT 1 FROM reference WHERE reference.granule_id = granule.granule_id)
+        FROM granule ORDER BY last_access;''').fetchall()
+
+    # identical content is stored only once
+    object_sizes = {sha256: size for _, sha256, size, _ in rows}
+    store_size = sum(object_sizes.values())
+
+    keep_granule_ids = set(keep_granule_ids)
+    evicted_granule_ids = []
+    for granule_id, sha256, size, is_referenced in rows:
+        if store_size <= max_size_bytes:
+            break
+        if is_referenced or granule_id in keep_granule_ids:
+            continue
+
+        delete_granule(conn, store_directory, granule_id, sha256)
+        if not os.path.exists(get_store_object_filepath(store_directory, sha256)):
+            store_size -= size
+        evicted_granule_ids.append(granule_id)
+        print('granule store: {0} evicted'.format(granule_id))
+
+    conn.commit()
+
+    if evicted_granule_ids:
+        print('granule store: {0} granules evicted, {1:.1f} MB in store'.format(len(evicted_granule_ids),
+                                                                               store_size / 1024 / 1024))
+    if store_size > max_size_bytes:
+        print('granule store: {0:.1f} MB in store, above limit: remaining granules are referenced by projects '
+              'or kept (see release_granules)'.format(store_size / 1024 / 1024))
+
+    return evicted_granule_ids
@@ -0,0 +1,157 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... h5 util functions
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import io
+import os
+import posixpath
+import struct
+import h5py
+
+HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+
+
+# HDF5 file format specification, section "Format Signature and Superblock"
+# https://docs.hdfgroup.org/hdf5/develop/_f_m_t3.html#Superblock
+def get_h5_end_of_file_address(filepath):
+    """Return end of file address stored in HDF5 superblock (= size of complete file), or None if not an HDF5 file."""
+    file_size = os.path.getsize(filepath)
+
+    with open(filepath, 'rb') as f:
+        # superblock is at offset 0, 512, 1024, 2048, ... (after optional user block)
+        superblock_offset = 0
+        while superblock_offset + 64 <= file_size:
+            f.seek(superblock_offset)
+            superblock = f.read(64)
+            if superblock[:8] == HDF5_SIGNATURE:
+                break
+            superblock_offset = 512 if superblock_offset == 0 else superblock_offset * 2
+        else:
+            return None
+
+    version = superblock[8]
+    if version in (0, 1):
+        size_of_offsets = superblock[13]
+        base_address_offset = 24 if version == 0 else 28
+    elif version in (2, 3):
+        size_of_offsets = superblock[9]
+        base_address_offset = 12
+    else:
+        return None
+
+    if size_of_offsets not in (4, 8):
+        return None
+    address_format = '<I' if size_of_offsets == 4 else '<Q'
+
+    # base address, free-space (v0/1) or superblock extension (v2/3) address, end of file address
+    # (the HDF5 library stores the end of file address including the user block, i.e. the file size)
+    return struct.unpack_from(address_format, superblock, base_address_offset + 2 * size_of_offsets)[0]
+
+
+def is_complete_h5_file(filepath):
+    # truncated downloads have a valid signature, but are shorter than the end of file address
+    return os.path.getsize(filepath) == get_h5_end_of_file_address(filepath)
+
+
+class RangeFile(io.RawIOBase):
+    """Read-only file object on top of read_range(start, end) -> bytes (e.g. HTTP Range requests).
+
+    Data is fetched in blocks of block_size bytes and kept in memory: HDF5 metadata (superblock, object headers,
+    chunk B-trees) is read in many small pieces, mostly from the same blocks. Consecutive missing blocks are
+    fetched with a single call of read_range.
+    """
+
+    def __init__(self, read_range, size, block_size, first_block=None):
+        super().__init__()
+        self.read_range = read_range
+        self.size = size
+        self.block_size = block_size
+        self.position = 0
+        self.blocks = {}
+        self.bytes_fetched = 0
+        self.number_of_requests = 0
+        # exception raised by read_range: HDF5 library only reports a generic read error
+        self.error = None
+        if first_block is not None:
+            self.blocks[0] = first_block
+            self.bytes_fetched += len(first_block)
+            self.number_of_requests += 1
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        else:
+            self.position = self.size + offset
+        return self.position
+
+    def fetch_blocks(self, first_index, last_index):
+
+        missing_indexes = [index for index in range(first_index, last_index + 1) if index not in self.blocks]
+        while missing_indexes:
+            # run of consecutive missing blocks
+            run_length = 1
+            while run_length < len(missing_indexes) and \
+                    missing_indexes[run_length] == missing_indexes[0] + run_length:
+                run_length += 1
+
+            start = missing_indexes[0] * self.block_size
+            end = min((missing_indexes[0] + run_length) * self.block_size, self.size) - 1
+            try:
+                data = self.read_range(start, end)
+            except Exception as e:
+                self.error = e
+                raise
+            self.bytes_fetched += len(data)
+            self.number_of_requests += 1
+
+            for index in missing_indexes[:run_length]:
+                offset = (index - missing_indexes[0]) * self.block_size
+                self.blocks[index] = data[offset:offset + self.block_size]
+            missing_indexes = missing_indexes[run_length:]
+
+    def readinto(self, buffer):
+
+        end = min(self.position + len(buffer), self.size)
+        if end <= self.position:
+            return 0
+
+        first_index = self.position // self.block_size
+        last_index = (end - 1) // self.block_size
+        self.fetch_blocks(first_index, last_index)
+
+        data = b''.join(self.blocks[index] for index in range(first_index, last_index + 1))
+        offset = self.position - first_index * self.block_size
+        number_of_bytes = end - self.position
+        buffer[:number_of_bytes] = data[offset:offset + number_of_bytes]
+        self.position = end
+
+        return number_of_bytes
+
+
+def copy_h5_objects(h5_in, filepath_out, object_paths):
+    """Copy datasets and groups (with their attributes) from an open h5 file to a new h5 file.
+
+    Chunks are copied as stored (still compressed): only the chunks of the requested datasets are read.
+    """
+    with h5py.File(filepath_out, 'w') as h5_out:
+        for object_path in object_paths:
+            object_path = object_path.strip('/')
+            parent_path, name = posixpath.split(object_path)
+            h5_in.copy(h5_in[object_path], h5_out.require_group('/' + parent_path), name=name)
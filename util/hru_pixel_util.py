@@ -0,0 +1,163 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... HRU pixel util functions (HRU -> raster pixel indexes and weights, cached per raster grid)
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import hashlib
+import os
+import numpy as np
+from rasterio.transform import rowcol
+from scipy import sparse
+from shapely.geometry import box
+from util.granule_store_util import get_file_sha256
+
+
+def get_hru_pixels(transform, shape, xs, ys):
+
+    # returns (unique pixels (flat indexes), index of each HRU in unique pixels, HRUs inside raster)
+    # all HRU coordinates are converted to (row, col) in one call
+    rows, cols = rowcol(transform, xs, ys)
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    is_inside = (rows >= 0) & (rows < shape[0]) & (cols >= 0) & (cols < shape[1])
+
+    # HRUs sharing a pixel: pixel is sampled once
+    flat_indexes = np.where(is_inside, rows * shape[1] + cols, 0)
+    unique_pixels, hru_pixel_indexes = np.unique(flat_indexes, return_inverse=True)
+
+    return unique_pixels, hru_pixel_indexes, is_inside
+
+
+# cache layout (next to HRU shapefile, deleted with it by 90_reset_all.py):
+# <HRU shapefile directory>/hru_pixel_index/<key>.npz    key: SHA-256 of HRU shapefile content + raster grid
+def open_hru_pixel_cache(hru_shapefile_path):
+
+    # HRU shapefile content is part of each key: a rebuilt HRU shapefile (step 04) does not reuse old indexes
+    return {'directory': os.path.join(os.path.dirname(hru_shapefile_path), 'hru_pixel_index'),
+            'hru_shapefile_sha256': get_file_sha256(hru_shapefile_path),
+            'grids': {}, 'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+
+def get_grid_key(hru_pixel_cache, kind, transform, shape):
+
+    # rasters of most dates share the same grid (AOI-aligned grid of step 03)
+    grid_signature = '{0}|{1}|{2}|{3}'.format(hru_pixel_cache['hru_shapefile_sha256'], kind,
+                                             ','.join(repr(float(value)) for value in tuple(transform)[:6]),
+                                             ','.join(str(value) for value in shape))
+    return hashlib.sha256(grid_signature.encode('utf-8')).hexdigest()
+
+
+def get_cached_arrays(hru_pixel_cache, kind, transform, shape, compute_arrays):
+    """Return dict of arrays computed by compute_arrays() for a raster grid: in memory, from disk or computed."""
+    key = get_grid_key(hru_pixel_cache, kind, transform, shape)
+    if key in hru_pixel_cache['grids']:
+        hru_pixel_cache['hits'] += 1
+        return hru_pixel_cache['grids'][key]
+
+    filepath = os.path.join(hru_pixel_cache['directory'], key + '.npz')
+    if os.path.exists(filepath):
+        with np.load(filepath) as npz_file:
+            arrays = {name: npz_file[name] for name in npz_file.files}
+        hru_pixel_cache['disk_hits'] += 1
+    else:
+        arrays = compute_arrays()
+        if not os.path.exists(hru_pixel_cache['directory']):
+            os.makedirs(hru_pixel_cache['directory'])
+        # write to temporary file first: an interrupted run never leaves a truncated cache entry
+        temp_filepath = filepath + '.tmp.npz'
+        np.savez(temp_filepath, **arrays)
+        os.replace(temp_filepath, filepath)
+        hru_pixel_cache['misses'] += 1
+
+    hru_pixel_cache['grids'][key] = arrays
+
+    return arrays
+
+
+def get_cached_hru_pixels(hru_pixel_cache, transform, shape, hru_shape_file):
+
+    # same result as get_hru_pixels; HRU coordinates are only read for grids not seen before
+    def compute_arrays():
+        unique_pixels, hru_pixel_indexes, is_inside = get_hru_pixels(
+            transform, shape, hru_shape_file.geometry.x.values, hru_shape_file.geometry.y.values)
+        return {'unique_pixels': unique_pixels, 'hru_pixel_indexes': hru_pixel_indexes, 'is_inside': is_inside}
+
+    arrays = get_cached_arrays(hru_pixel_cache, 'points', transform, shape, compute_arrays)
+
+    return arrays['unique_pixels'], arrays['hru_pixel_indexes'], arrays['is_inside']
+
+
+def get_hru_pixel_weights(transform, shape, hru_polygons, hru_ids, hru_id_field):
+    """Return sparse matrix (HRU x pixel) of areas of pixels covered by HRU polygons, HRUs in order of hru_ids.
+
+    Polygons (e.g. hrus2.shp of QSWAT+ project) list their HRU ids in hru_id_field, comma separated if a polygon
+    holds several HRUs. Areas are in square degrees: only their ratios are used (see get_zonal_means).
+    """
+    hru_rows = {str(hru_id): row for row, hru_id in enumerate(hru_ids)}
+    nrows, ncols = shape
+    matrix_rows, matrix_cols, weights = [], [], []
+
+    for hru_id_value, polygon in zip(hru_polygons[hru_id_field], hru_polygons.geometry):
+        rows_of_polygon = [hru_rows[hru_id.strip()] for hru_id in str(hru_id_value).split(',')
+                           if hru_id.strip() in hru_rows]
+        if not rows_of_polygon or polygon is None or polygon.is_empty:
+            continue
+
+        # candidate pixels: pixels within polygon bounds
+        min_x, min_y, max_x, max_y = polygon.bounds
+        (row_top, row_bottom), (col_left, col_right) = rowcol(transform, [min_x, max_x], [max_y, min_y])
+        for row in range(max(row_top, 0), min(row_bottom, nrows - 1) + 1):
+            for col in range(max(col_left, 0), min(col_right, ncols - 1) + 1):
+                pixel_x, pixel_y = transform * (col, row)
+                pixel_box = box(pixel_x, pixel_y + transform.e, pixel_x + transform.a, pixel_y)
+                area = polygon.intersection(pixel_box).area
+                if area > 0:
+                    for matrix_row in rows_of_polygon:
+                        matrix_rows.append(matrix_row)
+                        matrix_cols.append(row * ncols + col)
+                        weights.append(area)
+
+    # duplicate (HRU, pixel) entries of several polygons are summed
+    return sparse.csr_matrix((weights, (matrix_rows, matrix_cols)), shape=(len(hru_ids), nrows * ncols))
+
+
+def get_cached_hru_pixel_weights(hru_pixel_cache, transform, shape, hru_polygon_path, hru_polygons, hru_ids,
+                                 hru_id_field):
+
+    # HRU polygon shapefile content is part of key, as HRU shapefile content (HRU order)
+    def compute_arrays():
+        weights = get_hru_pixel_weights(transform, shape, hru_polygons, hru_ids, hru_id_field)
+        return {'data': weights.data, 'indices': weights.indices, 'indptr': weights.indptr,
+                'shape': np.array(weights.shape)}
+
+    kind = 'zonal|{0}|{1}'.format(get_file_sha256(hru_polygon_path), hru_id_field)
+    arrays = get_cached_arrays(hru_pixel_cache, kind, transform, shape, compute_arrays)
+
+    return sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(arrays['shape']))
+
+
+def get_zonal_means(weights, np_values, fill_value):
+    """Return area-weighted means (HRU x date) of np_values (pixel x date), no data pixels excluded.
+
+    Two sparse matrix products for all dates: weighted sum of valid values and sum of weights of valid pixels.
+    HRUs without any valid pixel get fill_value.
+    """
+    is_valid = (np_values != fill_value) & ~np.isnan(np_values)
+    weighted_sums = weights @ np.where(is_valid, np_values, 0).astype(np.float64)
+    valid_weights = weights @ is_valid.astype(np.float64)
+
+    zonal_means = np.full(weighted_sums.shape, fill_value, dtype=np.float64)
+    np.divide(weighted_sums, valid_weights, out=zonal_means, where=valid_weights > 0)
+
+    return zonal_means
+
+
+def print_hru_pixel_cache_stats(hru_pixel_cache):
+    print('HRU pixel index cache: {0} distinct raster grids, {1} hits in memory, {2} loaded from disk, '
+          '{3} computed'.format(len(hru_pixel_cache['grids']), hru_pixel_cache['hits'], hru_pixel_cache['disk_hits'],
+                                hru_pixel_cache['misses']))
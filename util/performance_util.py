@@ -9,6 +9,8 @@ Last changed on.. 02.05.2022
 """
 
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 
@@ -25,3 +27,18 @@ def end_time_measure(start_time, print_prefix=None):
     if print_prefix:
         print(print_prefix + str((timedelta(seconds=end_time - start_time))).split('.')[0])  # remove µs
     return end_time
+
+
+def ordered_parallel_map(function, items, max_workers, executor_class=ThreadPoolExecutor):
+    """Apply function to items in parallel and yield results in item order.
+
+    At most 2 * max_workers results are pending at any time: memory stays bounded for long item lists.
+    """
+    with executor_class(max_workers=max_workers) as executor:
+        futures = deque()
+        for item in items:
+            futures.append(executor.submit(function, item))
+            if len(futures) >= 2 * max_workers:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
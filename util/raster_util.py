@@ -0,0 +1,112 @@
+"""
+Author........... Gabriel Böhnke
+University....... UCLouvain, Faculty of bioscience engineering
+Email............ gabriel.bohnke@student.uclouvain.be
+
+Description...... raster util functions (compact soil moisture GeoTIFFs: scaled int16, compressed, tiled, overviews)
+Version.......... 1.00
+Last changed on.. 17.10.2026
+"""
+
+import numpy as np
+import rasterio
+import rasterio.shutil
+from rasterio.io import MemoryFile
+
+# no data value of SMAP soil moisture (value of no data pixels returned by read_raster_band)
+FILL_VALUE = -9999.0
+
+# soil moisture (cm3/cm3) stored as int16 = round(value / scale): 0.0001 keeps 4 decimals, far below product
+# accuracy (0.04 cm3/cm3), for values up to 3.2767
+SOIL_MOISTURE_SCALE_FACTOR = 0.0001
+INT16_NODATA = -32768
+
+# Cloud Optimized GeoTIFF: internal tiles, compression, overviews (GDAL COG driver)
+# https://gdal.org/drivers/raster/cog.html
+RASTER_COMPRESSION = 'DEFLATE'  # or 'ZSTD' (faster, needs GDAL built with ZSTD)
+RASTER_BLOCK_SIZE = 256
+RASTER_OVERVIEW_RESAMPLING = 'nearest'
+
+
+def encode_int16(np_data, scales):
+
+    # returns int16 array, or None if scaled values do not fit into int16 (e.g. quality flags)
+    np_data = np.asarray(np_data, dtype=np.float64)
+    valid = ~np.isnan(np_data) & (np_data != FILL_VALUE)
+
+    scaled = np.zeros(np_data.shape, dtype=np.float64)
+    for band_index, scale in enumerate(scales):
+        scaled[band_index] = np.round(np_data[band_index] / scale)
+
+    if valid.any() and (scaled[valid].min() <= INT16_NODATA or scaled[valid].max() > np.iinfo(np.int16).max):
+        return None
+
+    np_int16 = np.full(np_data.shape, INT16_NODATA, dtype=np.int16)
+    np_int16[valid] = scaled[valid]
+
+    return np_int16
+
+
+def write_raster(filepath_out, np_data, transform, crs, scales=None, band_descriptions=None):
+    """Write np_data (band, row, column) with FILL_VALUE (or NaN) as no data to a Cloud Optimized GeoTIFF.
+
+    With scales (one per band), values are stored as int16 = round(value / scale), with scale and INT16_NODATA in
+    the GeoTIFF: read_raster_band (or GDAL readers honouring scale/offset) return the values. Without scales, or if
+    scaled values do not fit into int16, values are stored as float32 with FILL_VALUE as no data.
+    """
+    np_data = np.asarray(np_data)
+    if np_data.ndim == 2:
+        np_data = np_data[np.newaxis]
+    number_of_bands, nrows, ncols = np_data.shape
+
+    np_int16 = encode_int16(np_data, scales) if scales is not None else None
+    if np_int16 is not None:
+        dtype, nodata, np_out = 'int16', INT16_NODATA, np_int16
+    else:
+        np_out = np.where(np.isnan(np_data), FILL_VALUE, np_data).astype(np.float32)
+        dtype, nodata, scales = 'float32', FILL_VALUE, None
+
+    # COG driver only creates copies: raster is built in memory first
+    with MemoryFile() as memory_file:
+        with memory_file.open(driver='GTiff', height=nrows, width=ncols, count=number_of_bands, dtype=dtype,
+                              crs=crs, transform=transform, nodata=nodata) as dataset:
+            dataset.write(np_out)
+            if scales is not None:
+                dataset.scales = scales
+                dataset.offsets = [0.0] * number_of_bands
+            if band_descriptions is not None:
+                for band_index, band_description in enumerate(band_descriptions):
+                    dataset.set_band_description(band_index + 1, band_description)
+
+        with memory_file.open() as dataset:
+            rasterio.shutil.copy(dataset, filepath_out, driver='COG', compress=RASTER_COMPRESSION, predictor='YES',
+                                 blocksize=RASTER_BLOCK_SIZE, overview_resampling=RASTER_OVERVIEW_RESAMPLING)
+
+
+def decode_raster_data(np_data, nodata, scale, offset, fill_value=FILL_VALUE):
+
+    # raw band values -> float32 values, no data -> fill_value
+    values = np_data.astype(np.float32)
+    if scale != 1.0 or offset != 0.0:
+        values = values * np.float32(scale) + np.float32(offset)
+    if nodata is not None:
+        values[np_data == nodata] = fill_value
+    values[np.isnan(values) | (values == FILL_VALUE)] = fill_value
+
+    return values
+
+
+def read_raster_band(src, band=1, fill_value=FILL_VALUE, window=None):
+
+    # band values of an open raster (scaled int16 or float32 rasters, of any version of step 03): float32 values,
+    # no data -> fill_value
+    return decode_raster_data(src.read(band, window=window), src.nodata, src.scales[band - 1],
+                              src.offsets[band - 1], fill_value)
+
+
+def get_raster_scales(src):
+
+    # scales to write a raster derived from src in the same format (None: float32)
+    if src.dtypes[0] == 'int16':
+        return list(src.scales)
+    return None
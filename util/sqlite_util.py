@@ -59,3 +59,75 @@ def count_sqlite_table_rows(database_filepath, table):
 
     # return row count
     return result
+
+
+# SWAT+ daily output tables (hru_wb_day, ...): rows are read by date and unit
+SWAT_DATE_UNIT_COLUMNS = ['yr', 'mon', 'day', 'unit']
+
+
+def create_index_if_missing(conn, table, columns):
+
+    # an existing index starting with the same columns (in this order) is used as is
+    for index_row in conn.execute('PRAGMA index_list(' + table + ');').fetchall():
+        index_columns = [row[2] for row in conn.execute('PRAGMA index_info(' + index_row[1] + ');').fetchall()]
+        if index_columns[:len(columns)] == list(columns):
+            return False
+
+    conn.execute('CREATE INDEX ' + table + '_' + '_'.join(columns) + ' ON ' + table + ' (' + ', '.join(columns) + ');')
+    conn.commit()
+    print('index created on ' + table + ' (' + ', '.join(columns) + ')')
+
+    return True
+
+
+def get_date_unit_filter(date_from=None, date_to=None, units=None):
+
+    # WHERE clause + parameters: dates 'YYYY-MM-DD' (inclusive), list of units (None: all)
+    # row values (yr, mon, day) are compared on the (yr, mon, day, unit) index
+    conditions = []
+    params = []
+    if date_from:
+        conditions.append('(yr, mon, day) >= (?, ?, ?)')
+        params += [int(value) for value in date_from.split('-')]
+    if date_to:
+        conditions.append('(yr, mon, day) <= (?, ?, ?)')
+        params += [int(value) for value in date_to.split('-')]
+    if units:
+        conditions.append('unit IN (' + ', '.join('?' * len(units)) + ')')
+        params += [int(unit) for unit in units]
+
+    where_clause = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+
+    return where_clause, params
+
+
+def read_sqlite_dates(database_filepath, table, date_from=None, date_to=None, units=None):
+
+    # distinct (yr, mon, day) of table, in date order (read from index only)
+    conn = sqlite3.connect(database_filepath)
+    create_index_if_missing(conn, table, SWAT_DATE_UNIT_COLUMNS)
+    where_clause, params = get_date_unit_filter(date_from, date_to, units)
+    result_df = pd.read_sql_query('SELECT DISTINCT yr, mon, day FROM ' + table + where_clause +
+                                  ' ORDER BY yr, mon, day;', conn, params=params)
+    conn.close()
+
+    return result_df
+
+
+def read_sqlite_table_chunks(database_filepath, table, columns, date_from=None, date_to=None, units=None,
+                             chunk_size=1000000):
+    """Yield dataframes of at most chunk_size rows of table, in (yr, mon, day, unit) order.
+
+    Date range and units are filtered by SQLite (index on (yr, mon, day, unit), created if missing): memory is set by
+    chunk_size, not by the size of the table.
+    """
+    conn = sqlite3.connect(database_filepath)
+    try:
+        create_index_if_missing(conn, table, SWAT_DATE_UNIT_COLUMNS)
+        where_clause, params = get_date_unit_filter(date_from, date_to, units)
+        select_statement = 'SELECT ' + ', '.join(columns) + ' FROM ' + table + where_clause + \
+                           ' ORDER BY ' + ', '.join(SWAT_DATE_UNIT_COLUMNS) + ';'
+        for chunk_df in pd.read_sql_query(select_statement, conn, params=params, chunksize=chunk_size):
+            yield chunk_df
+    finally:
+        conn.close()